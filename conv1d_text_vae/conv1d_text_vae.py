@@ -1,9 +1,14 @@
 import copy
+import gc
+import io
 import math
 import os
 import re
 import tempfile
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import List, Tuple, Union
 
 from annoy import AnnoyIndex
@@ -11,20 +16,99 @@ from gensim.models.keyedvectors import FastTextKeyedVectors
 import keras.backend as K
 from keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
 from keras import Input
-from keras.layers import Conv1D, Conv2DTranspose, MaxPool1D, UpSampling1D, BatchNormalization, Dropout, Dense
+from keras.layers import Conv1D, Conv2DTranspose, MaxPool1D, BatchNormalization, Dropout, Dense
 from keras.layers import GRU, Flatten, Reshape, RepeatVector, Permute, Multiply, Lambda, Cropping1D, Masking
 from keras.models import Model
 from keras.optimizers import RMSprop, Nadam
 from keras.utils import Sequence
 from nltk.tokenize.nist import NISTTokenizer
 import numpy as np
-from scipy.spatial import distance
 from scipy.sparse import csr_matrix
 from sklearn.base import BaseEstimator, TransformerMixin, ClassifierMixin
 from sklearn.utils.validation import check_is_fitted
 from sklearn.cluster import DBSCAN
 
 
+try:
+    from numba import njit, prange
+    NUMBA_IS_AVAILABLE = True
+except ImportError:
+    NUMBA_IS_AVAILABLE = False
+
+try:
+    import hnswlib
+    HNSWLIB_IS_AVAILABLE = True
+except ImportError:
+    HNSWLIB_IS_AVAILABLE = False
+
+try:
+    import simsimd
+    SIMSIMD_IS_AVAILABLE = True
+except ImportError:
+    SIMSIMD_IS_AVAILABLE = False
+
+
+MIN_CORPUS_SIZE_FOR_MULTIPROCESSING = 1000
+
+
+if NUMBA_IS_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _postprocess_word_vectors_kernel(word_vectors, prepared_word_vectors):  # pragma: no cover
+        n_times = word_vectors.shape[1]
+        end_token_idx = word_vectors.shape[2] - 1
+        for sample_idx in prange(word_vectors.shape[0]):
+            end_idx = n_times
+            for time_idx in range(n_times):
+                best_word_idx = 0
+                best_value = word_vectors[sample_idx, time_idx, 0]
+                for word_idx in range(1, end_token_idx + 1):
+                    if word_vectors[sample_idx, time_idx, word_idx] > best_value:
+                        best_value = word_vectors[sample_idx, time_idx, word_idx]
+                        best_word_idx = word_idx
+                if best_word_idx == end_token_idx:
+                    end_idx = max(time_idx, 1)
+                    break
+            for time_idx in range(end_idx):
+                vector_norm = 0.0
+                for word_idx in range(end_token_idx):
+                    vector_norm += word_vectors[sample_idx, time_idx, word_idx] ** 2
+                vector_norm = math.sqrt(vector_norm)
+                if vector_norm > 0.0:
+                    for word_idx in range(end_token_idx):
+                        prepared_word_vectors[sample_idx, time_idx, word_idx] = \
+                            word_vectors[sample_idx, time_idx, word_idx] / vector_norm
+                else:
+                    for word_idx in range(end_token_idx):
+                        prepared_word_vectors[sample_idx, time_idx, word_idx] = \
+                            word_vectors[sample_idx, time_idx, word_idx]
+
+
+@lru_cache(maxsize=32)
+def compile_special_symbols_re(special_symbols: frozenset):
+    """ Compile (and memoize) the regular expression matching any of the special symbols. """
+    return re.compile('(' + '|'.join([re.escape(cur) for cur in sorted(special_symbols)]) + ')')
+
+
+@lru_cache(maxsize=1)
+def get_nist_tokenizer() -> NISTTokenizer:
+    """ Return the process-wide `NISTTokenizer` instance (it is stateless, so one is enough). """
+    return NISTTokenizer()
+
+
+def tokenize_all_texts(texts: Union[list, tuple, np.ndarray], tokenizer: 'BaseTokenizer') -> List[List[Tuple[int, int]]]:
+    """ Tokenize each text into word bounds, in parallel processes for large corpora.
+
+    Tokenization is pure-Python CPU work without shared state, so for a large corpus it is distributed over all
+    CPU cores with a `ProcessPoolExecutor` (the tokenizer must be picklable, as `DefaultTokenizer` is). For a small
+    corpus the inter-process overhead is not worth it, and texts are tokenized serially.
+
+    """
+    if (len(texts) < MIN_CORPUS_SIZE_FOR_MULTIPROCESSING) or ((os.cpu_count() or 1) < 2):
+        return [tokenizer.tokenize_into_words(cur_text) for cur_text in texts]
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(tokenizer.tokenize_into_words, texts, chunksize=64))
+
+
 class BaseTokenizer:
     def tokenize_into_words(self, src: str) -> List[Tuple[int, int]]:
         raise NotImplemented
@@ -32,25 +116,29 @@ class BaseTokenizer:
     @staticmethod
     def tokenize_into_characters(src: str, bounds_of_words: List[Tuple[int, int]]) -> List[str]:
         characters_list = []
+        append_character = characters_list.append
+        extend_characters = characters_list.extend
         start_pos = 0
         for bounds_of_cur_word in bounds_of_words:
             if bounds_of_cur_word[0] > start_pos:
-                characters_list.append('\n' if '\n' in src[start_pos:bounds_of_cur_word[0]] else ' ')
-            characters_list += list(src[bounds_of_cur_word[0]:bounds_of_cur_word[1]])
+                append_character('\n' if src.find('\n', start_pos, bounds_of_cur_word[0]) >= 0 else ' ')
+            extend_characters(src[bounds_of_cur_word[0]:bounds_of_cur_word[1]])
             start_pos = bounds_of_cur_word[1]
         if start_pos < len(src):
-            characters_list.append('\n' if '\n' in src[start_pos:] else ' ')
+            append_character('\n' if src.find('\n', start_pos) >= 0 else ' ')
         return characters_list
 
 
 class DefaultTokenizer(BaseTokenizer):
+    MAX_CACHE_SIZE = 100000
+
     def __init__(self, special_symbols: set=None):
         super().__init__()
         self.special_symbols = special_symbols
-        self.tokenizer = NISTTokenizer()
+        self.tokenizer = get_nist_tokenizer()
+        self._tokenization_cache = dict()
         if (self.special_symbols is not None) and (len(self.special_symbols) > 0):
-            re_expr = '(' + '|'.join([re.escape(cur) for cur in self.special_symbols]) + ')'
-            self.re_for_special_symbols = re.compile(re_expr)
+            self.re_for_special_symbols = compile_special_symbols_re(frozenset(self.special_symbols))
         else:
             self.re_for_special_symbols = None
 
@@ -102,15 +190,29 @@ class DefaultTokenizer(BaseTokenizer):
         prep = src.strip()
         if len(prep) == 0:
             return []
+        cached_bounds = self._tokenization_cache.get(src)
+        if cached_bounds is not None:
+            return list(cached_bounds)
         bounds_of_tokens = []
         end_pos = 0
-        for cur_token in filter(lambda it2: len(it2) > 0,
-                                map(lambda it1: it1.strip(), self.tokenizer.international_tokenize(src))):
-            start_pos = src.find(cur_token, end_pos)
-            if start_pos < 0:
-                raise ValueError('Token `{0}` cannot be found in the text `{1}`!'.format(cur_token, src))
+        n_characters = len(src)
+        for cur_token in self.tokenizer.international_tokenize(src):
+            cur_token = cur_token.strip()
+            if len(cur_token) == 0:
+                continue
+            while (end_pos < n_characters) and src[end_pos].isspace():
+                end_pos += 1
+            if src.startswith(cur_token, end_pos):
+                start_pos = end_pos
+            else:
+                start_pos = src.find(cur_token, end_pos)
+                if start_pos < 0:
+                    raise ValueError('Token `{0}` cannot be found in the text `{1}`!'.format(cur_token, src))
             end_pos = start_pos + len(cur_token)
             bounds_of_tokens.append((start_pos, end_pos))
+        if len(self._tokenization_cache) >= self.MAX_CACHE_SIZE:
+            self._tokenization_cache.clear()
+        self._tokenization_cache[src] = tuple(bounds_of_tokens)
         return bounds_of_tokens
 
     def __getstate__(self):
@@ -119,28 +221,58 @@ class DefaultTokenizer(BaseTokenizer):
     def __setstate__(self, state):
         self.special_symbols = state['special_symbols']
         if (self.special_symbols is not None) and (len(self.special_symbols) > 0):
-            re_expr = '(' + '|'.join([re.escape(cur) for cur in self.special_symbols]) + ')'
-            self.re_for_special_symbols = re.compile(re_expr)
+            self.re_for_special_symbols = compile_special_symbols_re(frozenset(self.special_symbols))
         else:
             self.re_for_special_symbols = None
-        self.tokenizer = NISTTokenizer()
+        self.tokenizer = get_nist_tokenizer()
+        self._tokenization_cache = dict()
 
     def __copy__(self):
         cls = self.__class__
         result = cls.__new__(cls)
         result.special_symbols = self.special_symbols
-        result.tokenizer = NISTTokenizer()
+        result.re_for_special_symbols = self.re_for_special_symbols
+        result.tokenizer = get_nist_tokenizer()
+        result._tokenization_cache = dict()
+        return result
 
     def __deepcopy__(self, memodict={}):
         cls = self.__class__
         result = cls.__new__(cls)
         result.special_symbols = copy.deepcopy(self.special_symbols)
-        result.tokenizer = NISTTokenizer()
+        if (result.special_symbols is not None) and (len(result.special_symbols) > 0):
+            result.re_for_special_symbols = compile_special_symbols_re(frozenset(result.special_symbols))
+        else:
+            result.re_for_special_symbols = None
+        result.tokenizer = get_nist_tokenizer()
+        result._tokenization_cache = dict()
+        return result
 
 
 class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
     SEQUENCE_BEGIN = '<BOS>'
     SEQUENCE_END = '<EOS>'
+    MIN_VOCABULARY_SIZE_FOR_QUANTIZATION = 100000
+    MAX_VOCABULARY_SIZE_FOR_EXACT_NEIGHBOURS = 50000
+    MAX_LATENT_CACHE_SIZE = 100000
+    MAX_VOCABULARY_MATRIX_BYTES_IN_RAM = 256 * (1024 ** 2)
+    PARAM_SPEC = (
+        ('warm_start', (bool, int), True, False, False),
+        ('use_batch_norm', (bool, int), True, False, False),
+        ('use_attention', (bool, int), True, False, False),
+        ('verbose', (bool, int), True, False, False),
+        ('batch_size', int, 10, True, False),
+        ('max_epochs', int, 10, True, False),
+        ('latent_dim', int, 10, True, False),
+        ('input_text_size', int, 10, True, True),
+        ('output_text_size', int, 10, True, True),
+        ('output_onehot_size', int, 10, True, True),
+        ('n_filters', (int, tuple), None, False, False),
+        ('kernel_size', int, 10, True, False),
+        ('n_recurrent_units', int, 10, True, False),
+        ('validation_fraction', float, 10.5, False, False),
+        ('lr', float, 10.5, True, False)
+    )
 
     def __init__(self, input_embeddings: FastTextKeyedVectors, output_embeddings: FastTextKeyedVectors,
                  tokenizer: BaseTokenizer=None, n_filters: Union[int, tuple]=128, kernel_size: int=3, latent_dim: int=5,
@@ -167,23 +299,17 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         self.use_attention = use_attention
 
     def __del__(self):
-        if hasattr(self, 'vae_encoder_') or hasattr(self, 'vae_decoder_') or hasattr(self, 'generator_encoder_') or \
-                hasattr(self, 'generator_decoder_'):
-            if hasattr(self, 'vae_encoder_'):
-                del self.vae_encoder_
-            if hasattr(self, 'vae_decoder_'):
-                del self.vae_decoder_
-            if hasattr(self, 'generator_encoder_'):
-                del self.generator_encoder_
-            if hasattr(self, 'generator_decoder_'):
-                del self.generator_decoder_
-            K.clear_session()
-        if hasattr(self, 'input_embeddings'):
-            del self.input_embeddings
-        if hasattr(self, 'output_embeddings'):
-            del self.output_embeddings
-        if hasattr(self, 'tokenizer'):
-            del self.tokenizer
+        own_attributes = self.__dict__
+        own_attributes.pop('_deferred_weights_', None)
+        models_were_built = False
+        for attr_name in ('vae_encoder_', 'vae_decoder_', 'generator_encoder_', 'generator_decoder_'):
+            if own_attributes.pop(attr_name, None) is not None:
+                models_were_built = True
+        if models_were_built:
+            try:
+                K.clear_session()
+            except Exception:
+                pass
 
     def fit(self, X: Union[list, tuple, np.ndarray], y: Union[list, tuple, np.ndarray]=None):
         self.check_params(**self.get_params(deep=False))
@@ -215,48 +341,39 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         y_eval = y_[-n_eval_set:]
         X_train = X[:-n_eval_set]
         y_train = y_[:-n_eval_set]
-        max_text_size = 0
-        for idx in range(len(y_)):
-            bounds_of_words = self.tokenizer.tokenize_into_words(y_[idx])
-            text_size = len(bounds_of_words)
-            if text_size > max_text_size:
-                max_text_size = text_size
+        bounds_of_words_in_target_texts = tokenize_all_texts(y_, self.tokenizer)
+        max_text_size = max(map(len, bounds_of_words_in_target_texts), default=0)
         if max_text_size == 0:
             raise ValueError('The parameters `y` is wrong! All texts are empty!')
         if self.output_text_size is None:
             self.output_text_size_ = max_text_size
         else:
             self.output_text_size_ = self.output_text_size
-        if hasattr(self.tokenizer, 'special_symbols'):
-            if (self.tokenizer.special_symbols is None) or (len(self.tokenizer.special_symbols) == 0):
-                special_symbols = None
-            else:
-                special_symbols = tuple(sorted(list(self.tokenizer.special_symbols)))
-        else:
-            special_symbols = None
+        special_symbols = self.get_special_symbols()
+        self._special_symbols_ = special_symbols
+        bounds_of_words_in_input_texts = tokenize_all_texts(X_train + X_eval, self.tokenizer)
         input_texts = tuple([
-            Conv1dTextVAE.tokenize(cur_text, self.tokenizer.tokenize_into_words(cur_text))
-            for cur_text in X_train + X_eval
+            Conv1dTextVAE.tokenize(cur_text, bounds_of_cur_text)
+            for cur_text, bounds_of_cur_text in zip(X_train + X_eval, bounds_of_words_in_input_texts)
         ])
         input_vocabulary, input_word_vectors = self.prepare_vocabulary_and_word_vectors(
             input_texts, self.input_embeddings, special_symbols)
         self.input_vector_size_ = input_word_vectors.shape[1]
         target_texts = []
         target_texts_by_characters = []
-        for cur_text in y_train + y_eval:
-            bounds_of_words = self.tokenizer.tokenize_into_words(cur_text)
+        for idx in range(len(y_)):
+            cur_text = y_[idx]
+            bounds_of_words = bounds_of_words_in_target_texts[idx]
             target_texts.append(Conv1dTextVAE.tokenize(cur_text, bounds_of_words))
             target_texts_by_characters.append(tuple(self.tokenizer.tokenize_into_characters(cur_text, bounds_of_words)))
         target_texts_by_characters = tuple(target_texts_by_characters)
         target_texts = tuple(target_texts)
-        target_characters = set()
-        self.output_text_size_in_characters_ = 0
+        del bounds_of_words_in_target_texts
+        target_characters = {self.SEQUENCE_BEGIN, self.SEQUENCE_END}
         for cur in target_texts_by_characters:
-            target_characters |= set(cur)
-            n_characters = len(cur)
-            if n_characters > self.output_text_size_in_characters_:
-                self.output_text_size_in_characters_ = n_characters
-        target_characters = sorted(list(target_characters | {self.SEQUENCE_BEGIN, self.SEQUENCE_END}))
+            target_characters.update(cur)
+        self.output_text_size_in_characters_ = max(map(len, target_texts_by_characters), default=0)
+        target_characters = sorted(target_characters)
         self.output_text_size_in_characters_ += 3
         self.target_char_index_ = dict([(char, i) for i, char in enumerate(target_characters)])
         self.reverse_target_char_index_ = dict((i, char) for char, i in self.target_char_index_.items())
@@ -278,11 +395,7 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
             self.__load_weights(self.vae_encoder_, all_weights)
         else:
             if self.input_text_size is None:
-                max_text_size = 0
-                for idx in range(len(X)):
-                    text_size = len(self.tokenizer.tokenize_into_words(X[idx]))
-                    if text_size > max_text_size:
-                        max_text_size = text_size
+                max_text_size = max(map(len, bounds_of_words_in_input_texts), default=0)
                 if max_text_size == 0:
                     raise ValueError('The parameters `X` is wrong! All texts are empty!')
                 self.input_text_size_ = max_text_size
@@ -293,6 +406,9 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                 input_vector_size=input_word_vectors.shape[1], output_vector_size=output_word_vectors.shape[1],
                 output_vectors=output_word_vectors
             )
+        del bounds_of_words_in_input_texts
+        input_word_vectors = self.share_word_vectors(input_word_vectors.astype(np.float16, copy=False))
+        output_word_vectors = self.share_word_vectors(output_word_vectors.astype(np.float16, copy=False))
         training_set_generator = SequenceForVAE(
             input_texts=input_texts[:len(X_train)], target_texts=target_texts[:len(y_train)], tokenizer=self.tokenizer,
             batch_size=self.batch_size, input_text_size=self.input_text_size_, output_text_size=self.output_text_size_,
@@ -326,7 +442,9 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                 verbose=(True if isinstance(self.verbose, int) and (self.verbose > 1) else False),
                 shuffle=True,
                 validation_data=evaluation_set_generator,
-                callbacks=callbacks
+                callbacks=callbacks,
+                workers=max(1, (os.cpu_count() or 1) // 2),
+                max_queue_size=10
             )
             if os.path.isfile(tmp_weights_name):
                 vae_model_for_training.load_weights(tmp_weights_name)
@@ -335,6 +453,8 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         finally:
             if os.path.isfile(tmp_weights_name):
                 os.remove(tmp_weights_name)
+        del output_word_vectors, output_vocabulary
+        gc.collect()
         if self.warm_start:
             for layer in vae_model_for_training.layers:
                 layer.trainable = True
@@ -372,7 +492,8 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                 verbose=(True if isinstance(self.verbose, int) and (self.verbose > 1) else False),
                 shuffle=True,
                 validation_data=evaluation_set_generator,
-                callbacks=callbacks
+                callbacks=callbacks,
+                max_queue_size=10
             )
             if os.path.isfile(tmp_weights_name):
                 seq2seq_model_for_training.load_weights(tmp_weights_name)
@@ -383,98 +504,129 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                 os.remove(tmp_weights_name)
         del vae_model_for_training
         del seq2seq_model_for_training
+        del input_word_vectors, input_vocabulary, input_texts, target_texts, target_texts_by_characters
+        gc.collect()
+        for inference_model in (self.vae_encoder_, self.vae_decoder_, self.generator_encoder_,
+                                self.generator_decoder_):
+            inference_model._make_predict_function()
+        self._latent_cache_ = OrderedDict()
         return self
 
     def transform(self, X: Union[list, tuple, np.ndarray]) -> np.ndarray:
         self.check_is_fitted()
         self.check_embeddings()
         self.check_texts_param(X, 'X')
-        outputs = None
-        if self.tokenizer is None:
-            self.tokenizer = DefaultTokenizer()
-        if hasattr(self.tokenizer, 'special_symbols'):
-            if self.tokenizer.special_symbols is not None:
-                special_symbols = tuple(sorted(list(self.tokenizer.special_symbols)))
-            else:
-                special_symbols = None
-        else:
-            special_symbols = None
-        for data_for_batch in self.texts_to_data(X, self.batch_size, self.input_text_size_, self.tokenizer,
-                                                 self.input_embeddings, special_symbols):
-            outputs_for_batch = self.vae_encoder_.predict_on_batch(data_for_batch)
-            start_pos = 0 if outputs is None else outputs.shape[0]
-            if (start_pos + outputs_for_batch.shape[0]) <= len(X):
-                n = outputs_for_batch.shape[0]
-            else:
-                n = len(X) - start_pos
-            if outputs is None:
-                outputs = outputs_for_batch[:n].copy()
+        special_symbols = getattr(self, '_special_symbols_', None)
+        if special_symbols is None:
+            special_symbols = self.get_special_symbols()
+        return self.__encode_texts(X, special_symbols)
+
+    def __encode_texts(self, X: Union[list, tuple, np.ndarray], special_symbols: Union[tuple, None]) -> np.ndarray:
+        """ Calculate the latent vector of each text, reusing cached encoder outputs for repeated texts. """
+        latent_cache = getattr(self, '_latent_cache_', None)
+        if latent_cache is None:
+            latent_cache = OrderedDict()
+            self._latent_cache_ = latent_cache
+        latent_vectors = np.empty((len(X), self.latent_dim), dtype=np.float32)
+        indices_of_unknown_texts = []
+        unknown_texts = []
+        for idx in range(len(X)):
+            cached_vector = latent_cache.get(X[idx])
+            if cached_vector is None:
+                indices_of_unknown_texts.append(idx)
+                unknown_texts.append(X[idx])
             else:
-                outputs = np.vstack((outputs, outputs_for_batch[:n]))
-        return outputs
+                latent_vectors[idx] = cached_vector
+        if len(unknown_texts) > 0:
+            start_pos = 0
+            for data_for_batch in self.__texts_to_data_into_buffer(unknown_texts, self.batch_size,
+                                                                   self.input_text_size_, self.tokenizer,
+                                                                   self.input_embeddings, special_symbols):
+                outputs_for_batch = self.vae_encoder_.predict_on_batch(data_for_batch)
+                n = min(outputs_for_batch.shape[0], len(unknown_texts) - start_pos)
+                for idx_in_part in range(n):
+                    idx = indices_of_unknown_texts[start_pos + idx_in_part]
+                    latent_vectors[idx] = outputs_for_batch[idx_in_part]
+                    latent_cache[unknown_texts[start_pos + idx_in_part]] = latent_vectors[idx].copy()
+                    if len(latent_cache) > self.MAX_LATENT_CACHE_SIZE:
+                        latent_cache.popitem(last=False)
+                start_pos += n
+        return latent_vectors
 
     def predict(self, X: Union[list, tuple, np.ndarray]) -> Union[list, tuple, np.ndarray]:
         self.check_is_fitted()
         self.check_embeddings()
         self.check_texts_param(X, 'X')
-        generated_texts = []
-        if self.tokenizer is None:
-            self.tokenizer = DefaultTokenizer()
-        if hasattr(self.tokenizer, 'special_symbols'):
-            if self.tokenizer.special_symbols is not None:
-                special_symbols = tuple(sorted(list(self.tokenizer.special_symbols)))
-            else:
-                special_symbols = None
-        else:
-            special_symbols = None
+        generated_texts = [None] * len(X)
+        special_symbols = getattr(self, '_special_symbols_', None)
+        if special_symbols is None:
+            special_symbols = self.get_special_symbols()
         n_all_texts = len(X)
-        start_pos = 0
         n_data_parts = 20
         data_part_size = len(X) // n_data_parts
         data_part_counter = 0
         if isinstance(self.verbose, int) and (self.verbose > 1):
             print('Prediction of texts with the VAE is started...')
-        for data_for_batch in self.texts_to_data(X, self.batch_size, self.input_text_size_, self.tokenizer,
-                                                 self.input_embeddings, special_symbols):
+        decoder_model = self.generator_decoder_
+        decoder_model._make_predict_function()
+        if decoder_model.uses_learning_phase and (not isinstance(K.learning_phase(), int)):
+            def decoder_step(target_seq_, state_value_):
+                return decoder_model.predict_function([target_seq_, state_value_, 0.])
+        else:
+            def decoder_step(target_seq_, state_value_):
+                return decoder_model.predict_function([target_seq_, state_value_])
+        characters_by_indices = np.array(
+            [self.reverse_target_char_index_[char_idx] for char_idx in range(len(self.reverse_target_char_index_))],
+            dtype=object
+        )
+        begin_char_idx = self.target_char_index_[self.SEQUENCE_BEGIN]
+        end_char_idx = self.target_char_index_[self.SEQUENCE_END]
+        latent_vectors = self.__encode_texts(X, special_symbols)
+        order_of_texts = sorted(range(n_all_texts), key=lambda text_idx: len(X[text_idx]))
+        n_batches = int(math.ceil(n_all_texts / self.batch_size))
+        for batch_ind in range(n_batches):
+            start_pos = batch_ind * self.batch_size
+            n_texts_in_batch = min(n_all_texts - start_pos, self.batch_size)
+            indices_in_batch = order_of_texts[start_pos:(start_pos + n_texts_in_batch)]
+            latent_batch = np.empty((self.batch_size, latent_vectors.shape[1]), dtype=np.float32)
+            latent_batch[:n_texts_in_batch] = latent_vectors[indices_in_batch]
+            latent_batch[n_texts_in_batch:] = latent_vectors[order_of_texts[-1]]
             reconstructed_word_vectors = self.postprocess_reconstructed_word_vectors(
-                self.vae_decoder_.predict_on_batch(self.vae_encoder_.predict_on_batch(data_for_batch))
+                self.vae_decoder_.predict_on_batch(latent_batch)
             )
             state_value = self.generator_encoder_.predict_on_batch(reconstructed_word_vectors)
-            batch_size = data_for_batch.shape[0]
-            end_pos = start_pos + data_for_batch.shape[0]
-            if end_pos > n_all_texts:
-                end_pos = n_all_texts
-            n_texts_in_batch = end_pos - start_pos
+            batch_size = latent_batch.shape[0]
             target_seq = np.zeros((batch_size, 1, len(self.target_char_index_)), dtype=np.float32)
-            stop_conditions = []
-            decoded_sentences = []
-            for text_idx in range(batch_size):
-                target_seq[text_idx, 0, self.target_char_index_[self.SEQUENCE_BEGIN]] = 1.0
-                stop_conditions.append(False)
-                decoded_sentences.append([])
-            while not all(stop_conditions):
-                output_tokens, state_value = self.generator_decoder_.predict_on_batch([target_seq, state_value])
-                indices_of_sampled_tokens = np.argmax(output_tokens[:, -1, :], axis=1)
-                for text_idx in range(batch_size):
-                    if stop_conditions[text_idx]:
-                        continue
-                    sampled_char = self.reverse_target_char_index_[indices_of_sampled_tokens[text_idx]]
-                    decoded_sentences[text_idx].append(sampled_char)
-                    if (sampled_char == self.SEQUENCE_END) or \
+            target_seq[:, 0, begin_char_idx] = 1.0
+            rows_to_orig = np.arange(batch_size)
+            row_is_stopped = np.zeros((batch_size,), dtype=bool)
+            decoded_sentences = [[] for _ in range(batch_size)]
+            while not row_is_stopped.all():
+                indices_of_sampled_tokens, state_value = decoder_step(target_seq, state_value)
+                sampled_chars = characters_by_indices[indices_of_sampled_tokens]
+                is_end_of_text = (indices_of_sampled_tokens == end_char_idx)
+                for row_idx in np.where(~row_is_stopped)[0]:
+                    text_idx = rows_to_orig[row_idx]
+                    decoded_sentences[text_idx].append(sampled_chars[row_idx])
+                    if is_end_of_text[row_idx] or \
                             (len(decoded_sentences[text_idx]) > self.output_text_size_in_characters_):
-                        stop_conditions[text_idx] = True
-                    for token_idx in range(len(self.target_char_index_)):
-                        target_seq[text_idx][0][token_idx] = 0.0
-                    target_seq[text_idx, 0, indices_of_sampled_tokens[text_idx]] = 1.0
+                        row_is_stopped[row_idx] = True
+                target_seq.fill(0.0)
+                target_seq[np.arange(target_seq.shape[0]), 0, indices_of_sampled_tokens] = 1.0
+                active_rows = np.where(~row_is_stopped)[0]
+                if 0 < active_rows.shape[0] < (target_seq.shape[0] // 2):
+                    target_seq = target_seq[active_rows]
+                    state_value = state_value[active_rows]
+                    rows_to_orig = rows_to_orig[active_rows]
+                    row_is_stopped = row_is_stopped[active_rows]
             for text_idx in range(n_texts_in_batch):
-                generated_texts.append(''.join(decoded_sentences[text_idx]))
+                generated_texts[indices_in_batch[text_idx]] = ''.join(decoded_sentences[text_idx])
                 if data_part_size > 0:
                     if ((text_idx + start_pos + 1) % data_part_size) == 0:
                         data_part_counter += 1
                         if isinstance(self.verbose, int) and (self.verbose > 1):
                             print('{0}% of texts are processed...'.format(data_part_counter * (100 // n_data_parts)))
-            start_pos += data_for_batch.shape[0]
-            del data_for_batch
+            del latent_batch
         if data_part_counter < n_data_parts:
             if isinstance(self.verbose, int) and (self.verbose > 1):
                 print('100% of texts are processed...')
@@ -544,24 +696,27 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         if len(word_vectors.shape) != 3:
             raise ValueError('The `word_vectors` parameter is wrong! Expected 3-D array, got {0}-D array!'.format(
                 len(word_vectors.shape)))
-        prepared_word_vectors = np.zeros(
-            shape=(word_vectors.shape[0], word_vectors.shape[1], word_vectors.shape[2] - 1),
-            dtype=word_vectors.dtype
+        if NUMBA_IS_AVAILABLE:
+            prepared_word_vectors = np.zeros(
+                shape=(word_vectors.shape[0], word_vectors.shape[1], word_vectors.shape[2] - 1),
+                dtype=word_vectors.dtype
+            )
+            _postprocess_word_vectors_kernel(np.ascontiguousarray(word_vectors), prepared_word_vectors)
+            return prepared_word_vectors
+        end_token_idx = word_vectors.shape[2] - 1
+        best_word_indices = word_vectors.argmax(axis=2)
+        is_end_token = (best_word_indices == end_token_idx)
+        end_idx = np.where(
+            is_end_token.any(axis=1),
+            np.maximum(is_end_token.argmax(axis=1), 1),
+            word_vectors.shape[1]
         )
-        end_idx = np.full(shape=(word_vectors.shape[0],), fill_value=word_vectors.shape[1], dtype=np.int32)
-        for sample_idx in range(word_vectors.shape[0]):
-            for time_idx in range(word_vectors.shape[1]):
-                best_word_idx = np.argmax(word_vectors[sample_idx][time_idx])
-                if best_word_idx == (word_vectors.shape[2] - 1):
-                    end_idx[sample_idx] = max(time_idx, 1)
-                    break
-        for sample_idx in range(word_vectors.shape[0]):
-            n = end_idx[sample_idx]
-            for time_idx in range(n):
-                prepared_word_vectors[sample_idx][time_idx] = \
-                    word_vectors[sample_idx][time_idx][:(word_vectors.shape[2] - 1)]
-                vector_norm = np.linalg.norm(prepared_word_vectors[sample_idx][time_idx])
-                prepared_word_vectors[sample_idx][time_idx] /= vector_norm
+        time_mask = np.arange(word_vectors.shape[1])[np.newaxis, :] < end_idx[:, np.newaxis]
+        prepared_word_vectors = word_vectors[:, :, :end_token_idx].copy()
+        norms_of_vectors = np.linalg.norm(prepared_word_vectors, axis=2, keepdims=True)
+        np.divide(prepared_word_vectors, norms_of_vectors, out=prepared_word_vectors,
+                  where=(norms_of_vectors > 0.0))
+        prepared_word_vectors[~time_mask] = 0.0
         return prepared_word_vectors
 
     def check_embeddings(self):
@@ -577,99 +732,156 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                 raise ValueError('The parameter `output_embeddings` is wrong! Expected `{0}`, got `{1}`.'.format(
                     type(FastTextKeyedVectors(vector_size=300, min_n=1, max_n=5)), type(self.output_embeddings)))
 
+    @staticmethod
+    def find_top_similar_words(word_vector: np.ndarray, embeddings_model: FastTextKeyedVectors,
+                               n: int) -> List[Tuple[str, float]]:
+        """ Find the `n` nearest in-vocabulary words for a vector by cosine similarity.
+
+        For small vocabularies this is an exact replacement for `FastTextKeyedVectors.similar_by_vector`: all
+        similarities are calculated with one BLAS matrix-vector product over the unit-normalized embedding matrix
+        (which gensim caches as `vectors_norm`), and the best `n` rows are selected with `np.argpartition` instead
+        of a full sort.
+
+        The scan over the embedding matrix is memory-bandwidth bound, so for very large vocabularies
+        (`MIN_VOCABULARY_SIZE_FOR_QUANTIZATION` rows or more) an int8 copy of the matrix with per-row scales is
+        built once, cached on the embeddings model, and used to pre-select a shortlist of `4 * n` candidates,
+        which are then re-scored in float32. On this path the result is approximate: the re-scoring is exact only
+        within the shortlist, so a true top-`n` word may be missed when the quantized score pushes it out of the
+        candidate set.
+
+        """
+        embeddings_model.init_sims()
+        vector_norm = np.linalg.norm(word_vector)
+        if vector_norm > 0.0:
+            word_vector = word_vector / vector_norm
+        normalized_vectors = embeddings_model.vectors_norm
+        word_vector = word_vector.astype(normalized_vectors.dtype)
+        if (normalized_vectors.shape[0] >= Conv1dTextVAE.MIN_VOCABULARY_SIZE_FOR_QUANTIZATION) and \
+                (n < normalized_vectors.shape[0]):
+            quantized_data = getattr(embeddings_model, '_quantized_vectors_for_search_', None)
+            if (quantized_data is None) or (quantized_data[0].shape != normalized_vectors.shape):
+                row_scales = np.abs(normalized_vectors).max(axis=1) / 127.0
+                row_scales[row_scales <= 0.0] = 1.0
+                quantized_vectors = np.round(normalized_vectors / row_scales[:, np.newaxis]).astype(np.int8)
+                quantized_data = (quantized_vectors, row_scales.astype(np.float32))
+                embeddings_model._quantized_vectors_for_search_ = quantized_data
+            quantized_vectors, row_scales = quantized_data
+            query_scale = np.abs(word_vector).max() / 127.0
+            if query_scale <= 0.0:
+                query_scale = 1.0
+            quantized_query = np.round(word_vector / query_scale).astype(np.int8)
+            approximate_scores = np.einsum('ij,j->i', quantized_vectors, quantized_query,
+                                           dtype=np.int32, casting='unsafe').astype(np.float32)
+            approximate_scores *= row_scales * query_scale
+            n_candidates = min(4 * n, normalized_vectors.shape[0])
+            candidate_indices = np.argpartition(-approximate_scores, n_candidates - 1)[:n_candidates]
+            scores = np.full((normalized_vectors.shape[0],), -np.inf, dtype=np.float32)
+            scores[candidate_indices] = normalized_vectors[candidate_indices].dot(word_vector)
+        else:
+            scores = normalized_vectors.dot(word_vector)
+        if n < scores.shape[0]:
+            best_indices = np.argpartition(-scores, n - 1)[:n]
+        else:
+            best_indices = np.arange(scores.shape[0])
+        best_indices = best_indices[np.argsort(-scores[best_indices])]
+        return [(embeddings_model.index2word[idx], float(scores[idx])) for idx in best_indices]
+
     @staticmethod
     def find_best_words(word_vector: np.ndarray, embeddings_model: FastTextKeyedVectors, n: int,
                         special_symbols: tuple=None) -> Union[List[tuple], None]:
         vector_size = Conv1dTextVAE.calc_vector_size(embeddings_model, special_symbols)
-        norm_value = np.linalg.norm(word_vector[:embeddings_model.vector_size])
+        norm_of_fasttext_part = float(np.linalg.norm(word_vector[:embeddings_model.vector_size]))
+        if (norm_of_fasttext_part < K.epsilon()) and \
+                (float(np.linalg.norm(word_vector[embeddings_model.vector_size:])) < K.epsilon()):
+            return None
+        norm_value = norm_of_fasttext_part
         if norm_value < K.epsilon():
             norm_value = 1.0
-        res = embeddings_model.similar_by_vector(word_vector[:embeddings_model.vector_size] / norm_value, topn=n)
-        best_vector = np.zeros((vector_size,), dtype=np.float32)
-        best_vector[0:embeddings_model.vector_size] = embeddings_model[res[0][0]]
-        norm_value = np.linalg.norm(best_vector)
-        if norm_value > 0.0:
-            best_vector /= norm_value
-        end_sentence_vector = np.zeros((vector_size,), dtype=np.float32)
-        end_sentence_vector[vector_size - 1] = 1.0
-        unknown_word_vector = np.zeros((vector_size,), dtype=np.float32)
-        unknown_word_vector[vector_size - 2] = 1.0
-        if (special_symbols is not None) and (len(special_symbols) > 0):
-            special_vectors = np.zeros((len(special_symbols), vector_size), dtype=np.float32)
-            distance_to_special_vectors = np.zeros((len(special_symbols),), dtype=np.float32)
-            for special_idx in range(len(special_symbols)):
-                special_vectors[special_idx][embeddings_model.vector_size + special_idx] = 1.0
-                distance_to_special_vectors[special_idx] = distance.cosine(word_vector, special_vectors[special_idx])
-            special_idx = int(distance_to_special_vectors.argmin())
+        res = Conv1dTextVAE.find_top_similar_words(word_vector[:embeddings_model.vector_size] / norm_value,
+                                                   embeddings_model, n)
+        n_special_symbols = 0 if special_symbols is None else len(special_symbols)
+        norm_of_word_vector = np.linalg.norm(word_vector)
+        if norm_of_word_vector <= 0.0:
+            norm_of_word_vector = 1.0
+        distance_to_end_vector = 1.0 - word_vector[vector_size - 1] / norm_of_word_vector
+        distance_to_unknown_word = 1.0 - word_vector[vector_size - 2] / norm_of_word_vector
+        if n_special_symbols > 0:
+            special_part = word_vector[embeddings_model.vector_size:(embeddings_model.vector_size + n_special_symbols)]
+            special_idx = int(np.argmax(special_part))
+            distance_to_special_vector = float(1.0 - special_part[special_idx] / norm_of_word_vector)
         else:
             special_idx = -1
-            distance_to_special_vectors = None
-        distance_to_end_vector = distance.cosine(word_vector, end_sentence_vector)
-        distance_to_unknown_word = distance.cosine(word_vector, unknown_word_vector)
-        distance_to_best_word = distance.cosine(word_vector, best_vector)
+            distance_to_special_vector = None
+        similarity_scale = norm_of_fasttext_part / float(norm_of_word_vector)
+        distances_to_similar_words = 1.0 - np.array([cur[1] for cur in res], dtype=np.float64) * similarity_scale
+        distance_to_best_word = distances_to_similar_words[0]
         if distance_to_end_vector < distance_to_unknown_word:
             if distance_to_end_vector < distance_to_best_word:
                 if special_idx >= 0:
-                    if distance_to_end_vector < distance_to_special_vectors[special_idx]:
+                    if distance_to_end_vector < distance_to_special_vector:
                         res = None
                     else:
-                        res = [(special_symbols[special_idx], distance_to_special_vectors[special_idx])]
+                        res = [(special_symbols[special_idx], distance_to_special_vector)]
                 else:
                     res = None
         else:
             if distance_to_unknown_word < distance_to_best_word:
                 if special_idx >= 0:
-                    if distance_to_unknown_word < distance_to_special_vectors[special_idx]:
+                    if distance_to_unknown_word < distance_to_special_vector:
                         res = []
                     else:
-                        res = [(special_symbols[special_idx], distance_to_special_vectors[special_idx])]
+                        res = [(special_symbols[special_idx], distance_to_special_vector)]
                 else:
                     res = []
             else:
                 if special_idx >= 0:
-                    if distance_to_special_vectors[special_idx] < distance_to_best_word:
-                        res = [(special_symbols[special_idx], distance_to_special_vectors[special_idx])]
+                    if distance_to_special_vector < distance_to_best_word:
+                        res = [(special_symbols[special_idx], distance_to_special_vector)]
                 else:
-                    vectors_of_similar_words = np.zeros((len(res), vector_size), dtype=np.float32)
-                    for idx in range(len(res)):
-                        vectors_of_similar_words[idx, 0:embeddings_model.vector_size] = embeddings_model[res[idx][0]]
-                        norm_value = np.linalg.norm(vectors_of_similar_words[idx])
-                        if norm_value > 0.0:
-                            vectors_of_similar_words[idx] /= norm_value
-                    res = [(res[idx][0], distance.cosine(word_vector, vectors_of_similar_words[idx]))
-                           for idx in range(len(res))]
+                    res = [(res[idx][0], float(distances_to_similar_words[idx])) for idx in range(len(res))]
                     res.sort(key=lambda it: (it[1], it[0]))
         return res
 
     @staticmethod
     def find_best_texts(variants_of_text: List[tuple], ntop: int) -> List[str]:
         used_variants = []
-        variants_and_distances = []
+        word_indices = []
+        variant_indices = []
+        distances = []
         new_variant = []
         for word_idx in range(len(variants_of_text)):
             variants_of_word = variants_of_text[word_idx]
             new_variant.append(variants_of_word[0][0])
             for variant_idx in range(1, len(variants_of_word)):
-                variants_and_distances.append(((word_idx, variant_idx), variants_of_word[variant_idx][1]))
-        used_variants.append(' '.join(new_variant))
-        variants_and_distances.sort(key=lambda it: (it[1], it[0][0], it[0][1]))
-        for variant_idx in range(min(ntop - 1, len(variants_and_distances))):
-            word_idx = variants_and_distances[variant_idx][0][0]
-            variants_of_word = variants_of_text[word_idx]
-            best_variant_idx = variants_and_distances[variant_idx][0][1]
-            new_variant[word_idx] = variants_of_word[best_variant_idx][0]
-            used_variants.append(' '.join(new_variant))
+                word_indices.append(word_idx)
+                variant_indices.append(variant_idx)
+                distances.append(variants_of_word[variant_idx][1])
+        cur_variant = ' '.join(new_variant)
+        used_variants.append(cur_variant)
+        word_indices = np.array(word_indices, dtype=np.int32)
+        variant_indices = np.array(variant_indices, dtype=np.int32)
+        order = np.lexsort((variant_indices, word_indices, np.array(distances, dtype=np.float64)))
+        word_lengths = np.array([len(cur_word) for cur_word in new_variant], dtype=np.int64)
+        word_starts = np.zeros((len(new_variant),), dtype=np.int64)
+        if len(new_variant) > 1:
+            word_starts[1:] = np.cumsum(word_lengths[:-1] + 1)
+        for pos in range(min(ntop - 1, order.shape[0])):
+            word_idx = int(word_indices[order[pos]])
+            best_variant_idx = int(variant_indices[order[pos]])
+            new_word = variants_of_text[word_idx][best_variant_idx][0]
+            word_start = int(word_starts[word_idx])
+            cur_variant = cur_variant[:word_start] + new_word + \
+                          cur_variant[(word_start + int(word_lengths[word_idx])):]
+            length_diff = len(new_word) - int(word_lengths[word_idx])
+            if length_diff != 0:
+                word_lengths[word_idx] = len(new_word)
+                word_starts[(word_idx + 1):] += length_diff
+            used_variants.append(cur_variant)
         return used_variants
 
     @staticmethod
     def copy_embeddings(src: FastTextKeyedVectors) -> FastTextKeyedVectors:
-        tmp_fasttext_name = Conv1dTextVAE.get_temp_name()
-        try:
-            src.save(tmp_fasttext_name)
-            res = FastTextKeyedVectors.load(tmp_fasttext_name)
-        finally:
-            Conv1dTextVAE.remove_fasttext_files(tmp_fasttext_name)
-        return res
+        return copy.deepcopy(src)
 
     @staticmethod
     def check_texts_param(param_value: Union[list, tuple, np.ndarray], param_name: str):
@@ -689,82 +901,21 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
 
     @staticmethod
     def check_params(**params):
-        if 'warm_start' not in params:
-            raise ValueError('The parameter `warm_start` is not defined!')
-        if (not isinstance(params['warm_start'], bool)) and (not isinstance(params['warm_start'], int)):
-            raise ValueError('The parameter `warm_start` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(True), type(params['warm_start'])))
-        if 'use_batch_norm' not in params:
-            raise ValueError('The parameter `use_batch_norm` is not defined!')
-        if (not isinstance(params['use_batch_norm'], bool)) and (not isinstance(params['use_batch_norm'], int)):
-            raise ValueError('The parameter `use_batch_norm` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(True), type(params['use_batch_norm'])))
-        if 'use_attention' not in params:
-            raise ValueError('The parameter `use_attention` is not defined!')
-        if (not isinstance(params['use_attention'], bool)) and (not isinstance(params['use_attention'], int)):
-            raise ValueError('The parameter `use_attention` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(True), type(params['use_attention'])))
-        if 'verbose' not in params:
-            raise ValueError('The parameter `verbose` is not defined!')
-        if (not isinstance(params['verbose'], bool)) and (not isinstance(params['verbose'], int)):
-            raise ValueError('The parameter `verbose` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(True), type(params['verbose'])))
-        if 'batch_size' not in params:
-            raise ValueError('The parameter `batch_size` is not defined!')
-        if not isinstance(params['batch_size'], int):
-            raise ValueError('The parameter `batch_size` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(10), type(params['batch_size'])))
-        if params['batch_size'] <= 0:
-            raise ValueError('The parameter `batch_size` is wrong! Expected a positive value, '
-                             'but {0} is not positive.'.format(params['batch_size']))
-        if 'max_epochs' not in params:
-            raise ValueError('The parameter `max_epochs` is not defined!')
-        if not isinstance(params['max_epochs'], int):
-            raise ValueError('The parameter `max_epochs` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(10), type(params['max_epochs'])))
-        if params['max_epochs'] <= 0:
-            raise ValueError('The parameter `max_epochs` is wrong! Expected a positive value, '
-                             'but {0} is not positive.'.format(params['max_epochs']))
-        if 'latent_dim' not in params:
-            raise ValueError('The parameter `latent_dim` is not defined!')
-        if not isinstance(params['latent_dim'], int):
-            raise ValueError('The parameter `latent_dim` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(10), type(params['latent_dim'])))
-        if params['latent_dim'] <= 0:
-            raise ValueError('The parameter `latent_dim` is wrong! Expected a positive value, '
-                             'but {0} is not positive.'.format(params['latent_dim']))
-        if 'input_text_size' not in params:
-            raise ValueError('The parameter `input_text_size` is not defined!')
-        if params['input_text_size'] is not None:
-            if not isinstance(params['input_text_size'], int):
-                raise ValueError('The parameter `input_text_size` is wrong! Expected `{0}`, got `{1}`.'.format(
-                    type(10), type(params['input_text_size'])))
-            if params['input_text_size'] <= 0:
-                raise ValueError('The parameter `input_text_size` is wrong! Expected a positive value, '
-                                 'but {0} is not positive.'.format(params['input_text_size']))
-        if 'output_text_size' not in params:
-            raise ValueError('The parameter `output_text_size` is not defined!')
-        if params['output_text_size'] is not None:
-            if not isinstance(params['output_text_size'], int):
-                raise ValueError('The parameter `output_text_size` is wrong! Expected `{0}`, got `{1}`.'.format(
-                    type(10), type(params['output_text_size'])))
-            if params['output_text_size'] <= 0:
-                raise ValueError('The parameter `output_text_size` is wrong! Expected a positive value, '
-                                 'but {0} is not positive.'.format(params['output_text_size']))
-        if 'output_onehot_size' not in params:
-            raise ValueError('The parameter `output_onehot_size` is not defined!')
-        if params['output_onehot_size'] is not None:
-            if not isinstance(params['output_onehot_size'], int):
-                raise ValueError('The parameter `output_onehot_size` is wrong! Expected `{0}`, got `{1}`.'.format(
-                    type(10), type(params['output_onehot_size'])))
-            if params['output_onehot_size'] <= 0:
-                raise ValueError('The parameter `output_onehot_size` is wrong! Expected a positive value, '
-                                 'but {0} is not positive.'.format(params['output_onehot_size']))
-        if 'n_filters' not in params:
-            raise ValueError('The parameter `n_filters` is not defined!')
-        if not isinstance(params['n_filters'], int) and (not isinstance(params['n_filters'], tuple)):
-            raise ValueError('The parameter `n_filters` is wrong! Expected `{0}` or `{1}`, got `{2}`.'.format(
-                type(10), type((1, 2)), type(params['n_filters'])))
+        for param_name, param_types, type_example, must_be_positive, none_is_allowed in Conv1dTextVAE.PARAM_SPEC:
+            if param_name not in params:
+                raise ValueError('The parameter `{0}` is not defined!'.format(param_name))
+            param_value = params[param_name]
+            if none_is_allowed and (param_value is None):
+                continue
+            if not isinstance(param_value, param_types):
+                if param_name == 'n_filters':
+                    raise ValueError('The parameter `n_filters` is wrong! Expected `{0}` or `{1}`, got `{2}`.'.format(
+                        type(10), type((1, 2)), type(param_value)))
+                raise ValueError('The parameter `{0}` is wrong! Expected `{1}`, got `{2}`.'.format(
+                    param_name, type(type_example), type(param_value)))
+            if must_be_positive and (param_value <= 0):
+                raise ValueError('The parameter `{0}` is wrong! Expected a positive value, '
+                                 'but {1} is not positive.'.format(param_name, param_value))
         if isinstance(params['n_filters'], int):
             if params['n_filters'] <= 0:
                 raise ValueError('The parameter `n_filters` is wrong! Expected a positive value, '
@@ -776,39 +927,16 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                 if params['n_filters'][idx] <= 0:
                     raise ValueError('Item {0} of the parameter `n_filters` is wrong! Expected a positive value, '
                                      'but {1} is not positive.'.format(idx, params['n_filters'][idx]))
-        if 'kernel_size' not in params:
-            raise ValueError('The parameter `kernel_size` is not defined!')
-        if not isinstance(params['kernel_size'], int):
-            raise ValueError('The parameter `kernel_size` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(10), type(params['kernel_size'])))
-        if params['kernel_size'] <= 0:
-            raise ValueError('The parameter `kernel_size` is wrong! Expected a positive value, '
-                             'but {0} is not positive.'.format(params['kernel_size']))
-        if 'n_recurrent_units' not in params:
-            raise ValueError('The parameter `n_recurrent_units` is not defined!')
-        if not isinstance(params['n_recurrent_units'], int):
-            raise ValueError('The parameter `n_recurrent_units` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(10), type(params['n_recurrent_units'])))
-        if params['n_recurrent_units'] <= 0:
-            raise ValueError('The parameter `n_recurrent_units` is wrong! Expected a positive value, '
-                             'but {0} is not positive.'.format(params['n_recurrent_units']))
-        if 'validation_fraction' not in params:
-            raise ValueError('The parameter `validation_fraction` is not defined!')
-        if not isinstance(params['validation_fraction'], float):
-            raise ValueError('The parameter `validation_fraction` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(10.5), type(params['validation_fraction'])))
         if (params['validation_fraction'] <= 0) or (params['validation_fraction'] >= 1.0):
             raise ValueError('The parameter `validation_fraction` is wrong! Expected a positive value between 0.0 and '
                              '1.0, but {0} does not correspond to this condition.'.format(
                 Conv1dTextVAE.float_to_string(params['validation_fraction'])))
-        if 'lr' not in params:
-            raise ValueError('The parameter `lr` is not defined!')
-        if not isinstance(params['lr'], float):
-            raise ValueError('The parameter `lr` is wrong! Expected `{0}`, got `{1}`.'.format(
-                type(10.5), type(params['lr'])))
-        if params['lr'] <= 0:
-            raise ValueError('The parameter `lr` is wrong! Expected a positive value, but {0} is not positive.'.format(
-                params['lr']))
+
+    def get_special_symbols(self) -> Union[tuple, None]:
+        special_symbols_of_tokenizer = getattr(self.tokenizer, 'special_symbols', None)
+        if (special_symbols_of_tokenizer is None) or (len(special_symbols_of_tokenizer) == 0):
+            return None
+        return tuple(sorted(special_symbols_of_tokenizer))
 
     @staticmethod
     def calc_vector_size(embeddings: FastTextKeyedVectors, special_symbols: Union[tuple, set, None]):
@@ -818,53 +946,114 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         return vector_size
 
     @staticmethod
-    def tokenize(src: str, bounds_of_words: List[Tuple[int, int]]) -> tuple:
-        return tuple(
-            filter(
-                lambda it2: len(it2) > 0, map(lambda it1: src[it1[0]:it1[1]].lower(), bounds_of_words)
+    def get_normalized_vectors_of_fasttext(fasttext_model: FastTextKeyedVectors) -> Tuple[np.ndarray, dict]:
+        normalized_vectors = getattr(fasttext_model, '_normalized_vectors_for_lookup_', None)
+        word_indices = getattr(fasttext_model, '_word_indices_for_lookup_', None)
+        if (normalized_vectors is None) or (word_indices is None):
+            fasttext_model.init_sims()
+            normalized_vectors = fasttext_model.vectors_norm
+            word_indices = dict(
+                (cur_word, word_idx) for word_idx, cur_word in enumerate(fasttext_model.index2word)
             )
-        )
+            fasttext_model._normalized_vectors_for_lookup_ = normalized_vectors
+            fasttext_model._word_indices_for_lookup_ = word_indices
+        return normalized_vectors, word_indices
+
+    @staticmethod
+    def tokenize(src: str, bounds_of_words: List[Tuple[int, int]]) -> tuple:
+        return tuple(src[start_pos:end_pos].lower() for start_pos, end_pos in bounds_of_words
+                     if end_pos > start_pos)
 
     @staticmethod
     def texts_to_data(input_texts: Union[list, tuple, np.ndarray], batch_size: int, max_text_size: int,
                       tokenizer: BaseTokenizer, fasttext_model: FastTextKeyedVectors, special_symbols: tuple=None):
+        for input_data in Conv1dTextVAE.__texts_to_data_into_buffer(input_texts, batch_size, max_text_size,
+                                                                    tokenizer, fasttext_model, special_symbols):
+            yield input_data.copy()
+
+    @staticmethod
+    def __texts_to_data_into_buffer(input_texts: Union[list, tuple, np.ndarray], batch_size: int, max_text_size: int,
+                                    tokenizer: BaseTokenizer, fasttext_model: FastTextKeyedVectors,
+                                    special_symbols: tuple=None):
         n_batches = int(math.ceil(len(input_texts) / batch_size))
         vector_size = Conv1dTextVAE.calc_vector_size(fasttext_model, special_symbols)
+        token_vectors_cache = dict()
+        if special_symbols is None:
+            indices_of_special_symbols = dict()
+        else:
+            indices_of_special_symbols = dict(
+                (cur_symbol, symbol_idx) for symbol_idx, cur_symbol in enumerate(special_symbols)
+            )
+        normalized_vectors, word_indices = Conv1dTextVAE.get_normalized_vectors_of_fasttext(fasttext_model)
+        bounds_of_all_texts = tokenize_all_texts(input_texts, tokenizer)
+        input_data = np.zeros((batch_size, max_text_size, vector_size), dtype=np.float32)
         for batch_ind in range(n_batches):
-            input_data = np.zeros((batch_size, max_text_size, vector_size), dtype=np.float32)
             start_pos = batch_ind * batch_size
-            end_pos = start_pos + batch_size
+            end_pos = min(start_pos + batch_size, len(input_texts))
+            if (end_pos - start_pos) < batch_size:
+                input_data = np.zeros((end_pos - start_pos, max_text_size, vector_size), dtype=np.float32)
+            elif batch_ind > 0:
+                input_data.fill(0.0)
+            positions_of_known_tokens = []
+            vectors_of_known_tokens = []
             for src_text_idx in range(start_pos, end_pos):
-                prep_text_idx = src_text_idx
-                if src_text_idx >= len(input_texts):
-                    prep_text_idx = len(input_texts) - 1
-                input_text = input_texts[prep_text_idx]
-                bounds_of_input_words = tokenizer.tokenize_into_words(input_text)
-                words_of_input_text = Conv1dTextVAE.tokenize(input_text, bounds_of_input_words)
+                input_text = input_texts[src_text_idx]
+                sample_idx = src_text_idx - start_pos
+                words_of_input_text = Conv1dTextVAE.tokenize(input_text, bounds_of_all_texts[src_text_idx])
                 for time_idx, token in enumerate(words_of_input_text):
                     if time_idx >= max_text_size:
                         break
-                    if (special_symbols is not None) and (token in special_symbols):
-                        input_data[src_text_idx - start_pos, time_idx,
-                                   fasttext_model.vector_size + special_symbols.index(token)] = 1.0
+                    if token in indices_of_special_symbols:
+                        input_data[sample_idx, time_idx,
+                                   fasttext_model.vector_size + indices_of_special_symbols[token]] = 1.0
                     else:
-                        try:
-                            word_vector = fasttext_model[token]
-                        except:
-                            word_vector = None
+                        if token in token_vectors_cache:
+                            word_vector = token_vectors_cache[token]
+                        else:
+                            row_of_token = word_indices.get(token)
+                            if row_of_token is not None:
+                                word_vector = normalized_vectors[row_of_token]
+                            else:
+                                try:
+                                    word_vector = fasttext_model[token]
+                                except KeyError:
+                                    word_vector = None
+                                if word_vector is not None:
+                                    vector_norm = np.linalg.norm(word_vector)
+                                    if vector_norm < K.epsilon():
+                                        vector_norm = 1.0
+                                    word_vector = np.asarray(word_vector / vector_norm, dtype=np.float32)
+                            token_vectors_cache[token] = word_vector
                         if word_vector is None:
-                            input_data[src_text_idx - start_pos, time_idx, vector_size - 2] = 1.0
+                            input_data[sample_idx, time_idx, vector_size - 2] = 1.0
                         else:
-                            vector_norm = np.linalg.norm(word_vector)
-                            if vector_norm < K.epsilon():
-                                vector_norm = 1.0
-                            input_data[src_text_idx - start_pos, time_idx, 0:fasttext_model.vector_size] = \
-                                word_vector / vector_norm
+                            positions_of_known_tokens.append((sample_idx, time_idx))
+                            vectors_of_known_tokens.append(word_vector)
                 time_idx = len(words_of_input_text)
                 if time_idx < max_text_size:
-                    input_data[src_text_idx - start_pos, time_idx, vector_size - 1] = 1.0
+                    input_data[sample_idx, time_idx, vector_size - 1] = 1.0
+            if len(vectors_of_known_tokens) > 0:
+                known_token_matrix = np.vstack(vectors_of_known_tokens).astype(np.float32)
+                token_positions = np.array(positions_of_known_tokens, dtype=np.int32)
+                input_data[token_positions[:, 0], token_positions[:, 1], 0:fasttext_model.vector_size] = \
+                    known_token_matrix
             yield input_data
 
+    @staticmethod
+    def share_word_vectors(word_vectors: np.ndarray) -> np.ndarray:
+        if isinstance(word_vectors, np.memmap):
+            return word_vectors
+        tmp_matrix_name = Conv1dTextVAE.get_temp_name()
+        shared_word_vectors = np.memmap(tmp_matrix_name, mode='w+', dtype=word_vectors.dtype,
+                                        shape=word_vectors.shape)
+        shared_word_vectors[:] = word_vectors
+        shared_word_vectors.flush()
+        try:
+            os.remove(tmp_matrix_name)
+        except OSError:
+            pass
+        return shared_word_vectors
+
     @staticmethod
     def get_temp_name():
         fp = tempfile.NamedTemporaryFile(delete=True)
@@ -889,28 +1078,9 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         if not isinstance(value, float):
             return str(value)
         res = '{0:.{1}f}'.format(value, precision)
-        n = len(res)
-        start_idx = 0
-        while start_idx < n:
-            if res[start_idx] != '0':
-                break
-            start_idx += 1
-        if start_idx >= n:
-            return '0'
-        if res[start_idx] == '.':
-            if start_idx == 0:
-                res = '0' + res
-                n += 1
-            else:
-                start_idx -= 1
-        end_idx = n - 1
-        while end_idx > start_idx:
-            if res[end_idx] != '0':
-                break
-            end_idx -= 1
-        if res[end_idx] != '.':
-            end_idx += 1
-        return res[start_idx:end_idx]
+        if '.' in res:
+            res = res.rstrip('0').rstrip('.')
+        return res if len(res) > 0 else '0'
 
     @staticmethod
     def quantize_word_vectors(word_vectors: np.ndarray, max_vocabulary_size: int,
@@ -920,41 +1090,83 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
             print('----------------------------------------')
             print('Calculation of neighbourhood matrix is started...')
             print('----------------------------------------')
-        word_vec_index = AnnoyIndex(word_vectors.shape[1])
-        for sample_idx in range(word_vectors.shape[0]):
-            word_vec_index.add_item(sample_idx, word_vectors[sample_idx])
-        word_vec_index.build(max(10, int(round(np.sqrt(word_vectors.shape[0])))))
-        if verbose:
-            print('AnnoyIndex has been built...')
         n_max_neighbours = min(3 * max(1, int(word_vectors.shape[0] // max_vocabulary_size)), word_vectors.shape[0] - 1)
-        all_data = np.empty((word_vectors.shape[0] * n_max_neighbours,), dtype=np.float32)
-        all_rows = np.empty(all_data.shape, dtype=np.int32)
-        all_cols = np.empty(all_data.shape, dtype=np.int32)
-        cell_idx = 0
-        n_data_parts = 10
-        data_part_size = word_vectors.shape[0] // n_data_parts
-        data_part_counter = 0
         start_time = time.time()
-        for sample_idx in range(word_vectors.shape[0]):
-            neighbours, distances = word_vec_index.get_nns_by_item(
-                sample_idx, n_max_neighbours, search_k=-1,
-                include_distances=True
-            )
-            for neighbour_idx in range(n_max_neighbours):
-                all_data[cell_idx] = distances[neighbour_idx]
-                all_rows[cell_idx] = sample_idx
-                all_cols[cell_idx] = neighbours[neighbour_idx]
-                cell_idx += 1
-            if data_part_size > 0:
-                if ((sample_idx + 1) % data_part_size) == 0:
-                    data_part_counter += 1
-                    if verbose:
-                        print('{0:.3f} seconds:\t{1}% of vectors has been processed...'.format(
-                            time.time() - start_time, data_part_counter * (100 // n_data_parts)))
-        if data_part_counter < n_data_parts:
+        if word_vectors.shape[0] <= Conv1dTextVAE.MAX_VOCABULARY_SIZE_FOR_EXACT_NEIGHBOURS:
+            all_data = np.empty((word_vectors.shape[0] * n_max_neighbours,), dtype=np.float32)
+            all_rows = np.repeat(np.arange(word_vectors.shape[0], dtype=np.int32), n_max_neighbours)
+            all_cols = np.empty(all_data.shape, dtype=np.int32)
+            block_size = 4096
+            if SIMSIMD_IS_AVAILABLE:
+                quantized_vectors = np.clip(np.round(word_vectors * 127.0), -127.0, 127.0).astype(np.int8)
+            else:
+                quantized_vectors = None
+            for block_start in range(0, word_vectors.shape[0], block_size):
+                block_end = min(block_start + block_size, word_vectors.shape[0])
+                if quantized_vectors is None:
+                    distances_of_block = 1.0 - np.dot(word_vectors[block_start:block_end], word_vectors.T)
+                else:
+                    distances_of_block = np.asarray(
+                        simsimd.cdist(quantized_vectors[block_start:block_end], quantized_vectors,
+                                      metric='cosine'),
+                        dtype=np.float32
+                    )
+                neighbours_of_block = np.argpartition(distances_of_block, n_max_neighbours - 1,
+                                                      axis=1)[:, :n_max_neighbours]
+                all_cols[(block_start * n_max_neighbours):(block_end * n_max_neighbours)] = \
+                    neighbours_of_block.ravel()
+                all_data[(block_start * n_max_neighbours):(block_end * n_max_neighbours)] = \
+                    np.take_along_axis(distances_of_block, neighbours_of_block, axis=1).ravel()
+                del distances_of_block, neighbours_of_block
+            del quantized_vectors
             if verbose:
                 print('{0:.3f} seconds:\t100% of vectors has been processed...'.format(time.time() - start_time))
-        del word_vec_index
+        elif HNSWLIB_IS_AVAILABLE:
+            word_vec_index = hnswlib.Index(space='cosine', dim=word_vectors.shape[1])
+            word_vec_index.init_index(max_elements=word_vectors.shape[0], ef_construction=200, M=16)
+            word_vec_index.add_items(word_vectors, np.arange(word_vectors.shape[0]), num_threads=-1)
+            word_vec_index.set_ef(max(50, 2 * n_max_neighbours))
+            if verbose:
+                print('hnswlib index has been built...')
+            neighbour_labels, neighbour_distances = word_vec_index.knn_query(word_vectors, k=n_max_neighbours,
+                                                                             num_threads=-1)
+            all_data = neighbour_distances.ravel().astype(np.float32)
+            all_rows = np.repeat(np.arange(word_vectors.shape[0], dtype=np.int32), n_max_neighbours)
+            all_cols = neighbour_labels.ravel().astype(np.int32)
+            if verbose:
+                print('{0:.3f} seconds:\t100% of vectors has been processed...'.format(time.time() - start_time))
+            del word_vec_index
+        else:
+            word_vec_index = AnnoyIndex(word_vectors.shape[1])
+            for sample_idx in range(word_vectors.shape[0]):
+                word_vec_index.add_item(sample_idx, word_vectors[sample_idx])
+            word_vec_index.build(max(10, int(round(np.sqrt(word_vectors.shape[0])))))
+            if verbose:
+                print('AnnoyIndex has been built...')
+            all_data = np.empty((word_vectors.shape[0] * n_max_neighbours,), dtype=np.float32)
+            all_rows = np.repeat(np.arange(word_vectors.shape[0], dtype=np.int32), n_max_neighbours)
+            all_cols = np.empty(all_data.shape, dtype=np.int32)
+            n_data_parts = 10
+            data_part_size = word_vectors.shape[0] // n_data_parts
+            data_part_counter = 0
+            for sample_idx in range(word_vectors.shape[0]):
+                neighbours, distances = word_vec_index.get_nns_by_item(
+                    sample_idx, n_max_neighbours, search_k=-1,
+                    include_distances=True
+                )
+                cell_idx = sample_idx * n_max_neighbours
+                all_data[cell_idx:(cell_idx + n_max_neighbours)] = distances
+                all_cols[cell_idx:(cell_idx + n_max_neighbours)] = neighbours
+                if data_part_size > 0:
+                    if ((sample_idx + 1) % data_part_size) == 0:
+                        data_part_counter += 1
+                        if verbose:
+                            print('{0:.3f} seconds:\t{1}% of vectors has been processed...'.format(
+                                time.time() - start_time, data_part_counter * (100 // n_data_parts)))
+            if data_part_counter < n_data_parts:
+                if verbose:
+                    print('{0:.3f} seconds:\t100% of vectors has been processed...'.format(time.time() - start_time))
+            del word_vec_index
         if verbose:
             print('Number of all elements is {0}.'.format(word_vectors.shape[0] * word_vectors.shape[0]))
             print('Part of nonzero elements is {0:.3%}.'.format(
@@ -982,22 +1194,15 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
             print('Number of all clusters (including noisy data) is {0}.'.format(n_clusters_with_noise))
             print('')
             print('Quantization with DBSCAN is started...')
+        cluster_ids = np.asarray(predicted, dtype=np.int64).copy()
+        noise_mask = (cluster_ids < 0)
+        cluster_ids[noise_mask] = n_clusters + np.arange(int(noise_mask.sum()))
+        frequencies = np.bincount(cluster_ids, minlength=n_clusters_with_noise).astype(np.int32)
         cluster_centers = np.zeros((n_clusters_with_noise, word_vectors.shape[1]), dtype=np.float32)
-        frequencies = np.zeros((n_clusters_with_noise,), dtype=np.int32)
-        n_noise_samples = 0
-        word_clusters = list()
-        for sample_idx in range(len(predicted)):
-            cluster_idx = predicted[sample_idx]
-            if cluster_idx < 0:
-                cluster_idx = n_clusters + n_noise_samples
-                n_noise_samples += 1
-            cluster_centers[cluster_idx] += word_vectors[sample_idx]
-            word_clusters.append(cluster_idx)
-            frequencies[cluster_idx] += 1
-        for cluster_idx in range(cluster_centers.shape[0]):
-            cluster_centers[cluster_idx] /= frequencies[cluster_idx]
-            vector_norm = np.linalg.norm(cluster_centers[cluster_idx])
-            cluster_centers[cluster_idx] /= vector_norm
+        np.add.at(cluster_centers, cluster_ids, word_vectors)
+        cluster_centers /= frequencies[:, np.newaxis]
+        cluster_centers /= np.linalg.norm(cluster_centers, axis=1, keepdims=True)
+        word_clusters = cluster_ids.tolist()
         del word_vectors
         del clustering
         del frequencies, predicted
@@ -1009,29 +1214,42 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
     @staticmethod
     def get_vocabulary_and_word_vectors_from_fasttext(
             all_texts, fasttext_vectors: FastTextKeyedVectors, special_symbols: Union[tuple, None],
-            max_vocabulary_size: int=None, verbose: bool=False) -> Tuple[dict, np.ndarray]:
+            max_vocabulary_size: int=None, verbose: bool=False,
+            special_and_unknown_words: dict=None) -> Tuple[dict, np.ndarray]:
         vocabulary = dict()
-        word_idx = 0
+        normalized_word_vectors = []
+        set_of_special_symbols = frozenset() if special_symbols is None else frozenset(special_symbols)
+        normalized_vectors, word_indices = Conv1dTextVAE.get_normalized_vectors_of_fasttext(fasttext_vectors)
         for cur_text in all_texts:
             for cur_word in filter(lambda it: len(it) > 0, cur_text):
-                if special_symbols is not None:
-                    if cur_word in special_symbols:
-                        continue
+                if cur_word in vocabulary:
+                    continue
+                if (special_and_unknown_words is not None) and (cur_word in special_and_unknown_words):
+                    continue
+                if cur_word in set_of_special_symbols:
+                    if special_and_unknown_words is not None:
+                        special_and_unknown_words[cur_word] = True
+                    continue
+                row_of_word = word_indices.get(cur_word)
+                if row_of_word is not None:
+                    vocabulary[cur_word] = len(normalized_word_vectors)
+                    normalized_word_vectors.append(normalized_vectors[row_of_word])
+                    continue
                 try:
                     word_vector = fasttext_vectors[cur_word]
-                except:
+                except KeyError:
                     word_vector = None
-                if (cur_word not in vocabulary) and (word_vector is not None):
-                    vector_norm = np.linalg.norm(word_vector)
-                    if vector_norm > K.epsilon():
-                        vocabulary[cur_word] = word_idx
-                        word_idx += 1
-        word_vectors = np.zeros((word_idx, fasttext_vectors.vector_size), dtype=np.float32)
-        for cur_word in vocabulary:
-            word_idx = vocabulary[cur_word]
-            word_vector = fasttext_vectors[cur_word]
-            vector_norm = np.linalg.norm(word_vector)
-            word_vectors[word_idx] = word_vector / vector_norm
+                vector_norm = 0.0 if word_vector is None else np.linalg.norm(word_vector)
+                if vector_norm > K.epsilon():
+                    vocabulary[cur_word] = len(normalized_word_vectors)
+                    normalized_word_vectors.append(word_vector / vector_norm)
+                elif special_and_unknown_words is not None:
+                    special_and_unknown_words[cur_word] = False
+        if len(normalized_word_vectors) > 0:
+            word_vectors = np.ascontiguousarray(np.vstack(normalized_word_vectors), dtype=np.float32)
+        else:
+            word_vectors = np.zeros((0, fasttext_vectors.vector_size), dtype=np.float32)
+        del normalized_word_vectors
         if (max_vocabulary_size is not None) and (max_vocabulary_size < word_vectors.shape[0]):
             word_clusters, word_vectors = Conv1dTextVAE.quantize_word_vectors(word_vectors, max_vocabulary_size,
                                                                               verbose)
@@ -1043,15 +1261,23 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
     def prepare_vocabulary_and_word_vectors(all_texts, fasttext_vectors: FastTextKeyedVectors,
                                             special_symbols: Union[tuple, None], max_vocabulary_size: int=None,
                                             verbose: bool=False) -> Tuple[dict, np.ndarray]:
+        special_and_unknown_words = dict()
         src_fasttext_vocabulary, src_fasttext_vectors = Conv1dTextVAE.get_vocabulary_and_word_vectors_from_fasttext(
-            all_texts, fasttext_vectors, special_symbols, max_vocabulary_size, verbose
+            all_texts, fasttext_vectors, special_symbols, max_vocabulary_size, verbose,
+            special_and_unknown_words
         )
         vector_size = Conv1dTextVAE.calc_vector_size(fasttext_vectors, special_symbols)
         vocabulary = dict()
-        word_vectors = np.zeros(
-            (src_fasttext_vectors.shape[0] + (0 if special_symbols is None else len(special_symbols)) + 2, vector_size),
-            dtype=np.float32
-        )
+        n_rows = src_fasttext_vectors.shape[0] + (0 if special_symbols is None else len(special_symbols)) + 2
+        if (n_rows * vector_size * 4) >= Conv1dTextVAE.MAX_VOCABULARY_MATRIX_BYTES_IN_RAM:
+            tmp_matrix_name = Conv1dTextVAE.get_temp_name()
+            word_vectors = np.memmap(tmp_matrix_name, mode='w+', dtype=np.float32, shape=(n_rows, vector_size))
+            try:
+                os.remove(tmp_matrix_name)
+            except OSError:
+                pass
+        else:
+            word_vectors = np.zeros((n_rows, vector_size), dtype=np.float32)
         word_vectors[0:src_fasttext_vectors.shape[0], 0:fasttext_vectors.vector_size] = src_fasttext_vectors
         if (special_symbols is not None) and (len(special_symbols) > 0):
             for word_idx in range(len(special_symbols)):
@@ -1059,35 +1285,41 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                              fasttext_vectors.vector_size + 1 + word_idx] = 1.0
         word_vectors[src_fasttext_vectors.shape[0], fasttext_vectors.vector_size] = 1.0
         word_vectors[word_vectors.shape[0] - 1, vector_size - 1] = 1.0
-        for cur_text in all_texts:
-            for cur_word in filter(lambda it: len(it) > 0, cur_text):
-                if cur_word not in vocabulary:
-                    if (special_symbols is not None) and (len(special_symbols) > 0):
-                        if cur_word in special_symbols:
-                            vocabulary[cur_word] = src_fasttext_vectors.shape[0] + 1 + special_symbols.index(cur_word)
-                        else:
-                            if cur_word in src_fasttext_vocabulary:
-                                vocabulary[cur_word] = src_fasttext_vocabulary[cur_word]
-                            else:
-                                vocabulary[cur_word] = src_fasttext_vectors.shape[0]
-                    else:
-                        if cur_word in src_fasttext_vocabulary:
-                            vocabulary[cur_word] = src_fasttext_vocabulary[cur_word]
-                        else:
-                            vocabulary[cur_word] = src_fasttext_vectors.shape[0]
+        if special_symbols is None:
+            indices_of_special_symbols = dict()
+        else:
+            indices_of_special_symbols = dict(
+                (cur_symbol, symbol_idx) for symbol_idx, cur_symbol in enumerate(special_symbols)
+            )
+        for cur_word in src_fasttext_vocabulary:
+            vocabulary[cur_word] = src_fasttext_vocabulary[cur_word]
+        for cur_word, word_is_special in special_and_unknown_words.items():
+            if word_is_special:
+                vocabulary[cur_word] = src_fasttext_vectors.shape[0] + 1 + indices_of_special_symbols[cur_word]
+            else:
+                vocabulary[cur_word] = src_fasttext_vectors.shape[0]
         vocabulary[''] = word_vectors.shape[0] - 1
+        del special_and_unknown_words
         del src_fasttext_vectors
         del src_fasttext_vocabulary
         return vocabulary, word_vectors
 
-    def __load_weights(self, model: Model, weights_as_bytes: Union[bytearray, bytes]):
-        if (not isinstance(weights_as_bytes, bytearray)) and (not isinstance(weights_as_bytes, bytes)):
-            raise ValueError('The `weights_as_bytes` must be an array of bytes, not `{0}`!'.format(
-                type(weights_as_bytes)))
+    def __load_weights(self, model: Model, weights_of_model: Union[list, bytearray, bytes]):
+        if isinstance(weights_of_model, list):
+            model.set_weights(weights_of_model)
+            return
+        if (not isinstance(weights_of_model, bytearray)) and (not isinstance(weights_of_model, bytes)):
+            raise ValueError('The `weights_of_model` must be a list of numpy arrays or an array of bytes, '
+                             'not `{0}`!'.format(type(weights_of_model)))
+        try:
+            model.load_weights(io.BytesIO(weights_of_model))
+            return
+        except (TypeError, OSError):
+            pass
         tmp_weights_name = self.get_temp_name()
         try:
             with open(tmp_weights_name, 'wb') as fp:
-                fp.write(weights_as_bytes)
+                fp.write(weights_of_model)
             model.load_weights(tmp_weights_name)
             os.remove(tmp_weights_name)
         finally:
@@ -1096,18 +1328,7 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
 
     def __dump_weights(self, model: Model):
         self.check_is_fitted()
-        tmp_weights_name = self.get_temp_name()
-        try:
-            if os.path.isfile(tmp_weights_name):
-                os.remove(tmp_weights_name)
-            model.save_weights(tmp_weights_name)
-            with open(tmp_weights_name, 'rb') as fp:
-                weights_of_model = fp.read()
-            os.remove(tmp_weights_name)
-        finally:
-            if os.path.isfile(tmp_weights_name):
-                os.remove(tmp_weights_name)
-        return weights_of_model
+        return model.get_weights()
 
     def __getstate__(self):
         state = self.get_params(deep=False)
@@ -1116,14 +1337,22 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         params_after_fitting = ['input_text_size_', 'output_text_size_', 'input_vector_size_', 'output_vector_size_',
                                'vae_encoder_', 'vae_decoder_', 'generator_encoder_', 'generator_decoder_',
                                'output_text_size_in_characters_', 'target_char_index_', 'reverse_target_char_index_']
+        if '_deferred_weights_' in self.__dict__:
+            state['input_text_size_'] = self.input_text_size_
+            state['output_text_size_'] = self.output_text_size_
+            state['input_vector_size_'] = self.input_vector_size_
+            state['output_vector_size_'] = self.output_vector_size_
+            state['output_text_size_in_characters_'] = self.output_text_size_in_characters_
+            state['target_char_index_'] = dict(self.target_char_index_)
+            state['weights_'] = self._deferred_weights_
+            return state
         if all(map(lambda it: hasattr(self, it), params_after_fitting)):
             state['input_text_size_'] = self.input_text_size_
             state['output_text_size_'] = self.output_text_size_
             state['input_vector_size_'] = self.input_vector_size_
             state['output_vector_size_'] = self.output_vector_size_
             state['output_text_size_in_characters_'] = self.output_text_size_in_characters_
-            state['target_char_index_'] = copy.deepcopy(self.target_char_index_)
-            state['reverse_target_char_index_'] = copy.deepcopy(self.reverse_target_char_index_)
+            state['target_char_index_'] = dict(self.target_char_index_)
             state['weights_'] = {
                 'vae_encoder': self.__dump_weights(self.vae_encoder_),
                 'vae_decoder': self.__dump_weights(self.vae_decoder_),
@@ -1138,6 +1367,7 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         state['input_embeddings'] = None
         state['output_embeddings'] = None
         self.check_params(**state)
+        self.__dict__.pop('_deferred_weights_', None)
         if hasattr(self, 'vae_encoder_') or hasattr(self, 'vae_decoder_') or hasattr(self, 'generator_encoder_') or \
                 hasattr(self, 'generator_decoder_'):
             if hasattr(self, 'vae_encoder_'):
@@ -1152,7 +1382,7 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         is_fitted = all(map(
             lambda it: it in state,
             ['input_text_size_', 'output_text_size_', 'input_vector_size_', 'output_vector_size_', 'weights_',
-             'output_text_size_in_characters_', 'target_char_index_', 'reverse_target_char_index_']
+             'output_text_size_in_characters_', 'target_char_index_']
         ))
         self.set_params(**state)
         if is_fitted:
@@ -1170,17 +1400,31 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
             self.input_text_size_ = state['input_text_size_']
             self.output_text_size_ = state['output_text_size_']
             self.output_text_size_in_characters_ = state['output_text_size_in_characters_']
-            self.target_char_index_ = copy.deepcopy(state['target_char_index_'])
-            self.reverse_target_char_index_ = copy.deepcopy(state['reverse_target_char_index_'])
+            self.target_char_index_ = dict(state['target_char_index_'])
+            self.reverse_target_char_index_ = dict((i, char) for char, i in self.target_char_index_.items())
             self.input_vector_size_ = state['input_vector_size_']
             self.output_vector_size_ = state['output_vector_size_']
-            self.vae_encoder_, self.vae_decoder_, self.generator_encoder_, self.generator_decoder_, _, _ = \
-                self.__create_model(input_vector_size=self.input_vector_size_,
-                                    output_vector_size=self.output_vector_size_)
-            self.__load_weights(self.vae_encoder_, state['weights_']['vae_encoder'])
-            self.__load_weights(self.vae_decoder_, state['weights_']['vae_decoder'])
-            self.__load_weights(self.generator_encoder_, state['weights_']['seq2seq_encoder'])
-            self.__load_weights(self.generator_decoder_, state['weights_']['seq2seq_decoder'])
+            self._deferred_weights_ = state['weights_']
+
+    def __getattr__(self, name):
+        if name in ('vae_encoder_', 'vae_decoder_', 'generator_encoder_', 'generator_decoder_'):
+            if '_deferred_weights_' in self.__dict__:
+                self.__restore_models_from_deferred_weights()
+                return self.__dict__[name]
+        raise AttributeError('`{0}` object has no attribute `{1}`'.format(type(self).__name__, name))
+
+    def __restore_models_from_deferred_weights(self):
+        deferred_weights = self.__dict__.pop('_deferred_weights_')
+        self.vae_encoder_, self.vae_decoder_, self.generator_encoder_, self.generator_decoder_, _, _ = \
+            self.__create_model(input_vector_size=self.input_vector_size_,
+                                output_vector_size=self.output_vector_size_)
+        self.__load_weights(self.vae_encoder_, deferred_weights['vae_encoder'])
+        self.__load_weights(self.vae_decoder_, deferred_weights['vae_decoder'])
+        self.__load_weights(self.generator_encoder_, deferred_weights['seq2seq_encoder'])
+        self.__load_weights(self.generator_decoder_, deferred_weights['seq2seq_decoder'])
+        for inference_model in (self.vae_encoder_, self.vae_decoder_, self.generator_encoder_,
+                                self.generator_decoder_):
+            inference_model._make_predict_function()
 
     def __create_model(self, input_vector_size: int, output_vector_size: int, output_vectors: np.ndarray=None,
                        warm_start: bool=False) -> Tuple[Model, Model, Model, Model, Model, Model]:
@@ -1188,14 +1432,11 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         def sampling(args):
             z_mean_, z_log_var_ = args
             epsilon = K.random_normal(shape=(K.shape(z_mean_)[0], self.latent_dim), mean=0.0, stddev=1.0)
-            return z_mean_ + K.exp(z_log_var_) * epsilon
+            return z_mean_ + K.exp(0.5 * z_log_var_) * epsilon
 
         def vae_loss(y_true, y_pred):
-            y_pred_ = K.softmax(
-                (1.0 / tau) * K.dot(K.l2_normalize(y_pred, axis=-1), weights_of_layer_for_reconstruction),
-                axis=-1
-            )
-            xent_loss = K.categorical_crossentropy(target=y_true, output=y_pred_, axis=-1)
+            logits = (1.0 / tau) * K.dot(K.l2_normalize(y_pred, axis=-1), weights_of_layer_for_reconstruction)
+            xent_loss = K.categorical_crossentropy(target=y_true, output=logits, from_logits=True, axis=-1)
             mask = K.cast(K.any(K.not_equal(y_true, 0.0), axis=-1), dtype=K.dtype(xent_loss))
             xent_loss = xent_loss * mask
             xent_loss = K.sum(xent_loss, axis=-1) / K.sum(mask, axis=-1)
@@ -1212,13 +1453,16 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
             output_attention_mul = Multiply(name='attention_mul')([inputs, a_probs])
             return output_attention_mul
 
+        expand_time_axis = Lambda(lambda x: K.expand_dims(x, axis=2), name='deconv1d_expand_time_axis')
+        squeeze_time_axis = Lambda(lambda x: K.squeeze(x, axis=2), name='deconv1d_squeeze_time_axis')
+
         def Conv1DTranspose(input_tensor, filters, kernel_size, strides=1, padding='same', activation='tanh',
                             name: str = "", trainable: bool = True):
-            x = Lambda(lambda x: K.expand_dims(x, axis=2), name=name + '_deconv1d_part1')(input_tensor)
+            x = expand_time_axis(input_tensor)
             x = Conv2DTranspose(filters=filters, kernel_size=(kernel_size, 1),
                                 activation=activation, strides=(strides, 1), padding=padding,
                                 name=name + '_deconv1d_part2', trainable=trainable)(x)
-            x = Lambda(lambda x: K.squeeze(x, axis=2), name=name + '_deconv1d_part3')(x)
+            x = squeeze_time_axis(x)
             return x
 
         encoder_input = Input(shape=(self.input_text_size_, input_vector_size), dtype='float32',
@@ -1244,36 +1488,31 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         z_mean = Dense(self.latent_dim, name='z_mean', trainable=(not warm_start))(encoder)
         z_log_var = Dense(self.latent_dim, name='z_log_var', trainable=(not warm_start))(encoder)
         z = Lambda(sampling, name='z')([z_mean, z_log_var])
-        n_times_of_decoder = int(math.ceil((self.output_text_size_ - self.kernel_size + 1) / 2.0))
-        if isinstance(self.n_filters, tuple):
-            for _ in range(len(self.n_filters) - 1):
-                n_times_of_decoder = int(math.ceil((n_times_of_decoder - self.kernel_size + 1) / 2.0))
+        n_deconv_blocks = 1 if isinstance(self.n_filters, int) else len(self.n_filters)
+        n_times_of_decoder = int(math.ceil(self.output_text_size_ / float(2 ** n_deconv_blocks)))
         width = max(10, int(math.ceil(self.latent_dim / float(n_times_of_decoder))))
         deconv_decoder_input = Input(shape=(self.latent_dim,), dtype='float32', name='deconv_decoder_input')
         deconv_decoder = Dense(n_times_of_decoder * width, activation='relu', name='deconv_decoder_dense')(
             Dropout(0.3, name='deconv_decoder_dropout')(deconv_decoder_input))
         deconv_decoder = Reshape((n_times_of_decoder, width), name='deconv_decoder_reshape')(deconv_decoder)
         n_filters = self.n_filters if isinstance(self.n_filters, int) else self.n_filters[-1]
-        deconv_decoder = Conv1DTranspose(deconv_decoder, filters=n_filters, kernel_size=self.kernel_size,
-                                         activation='relu', name='deconv_decoder_1', trainable=True, padding='valid')
+        deconv_decoder = Conv1DTranspose(deconv_decoder, filters=n_filters, kernel_size=self.kernel_size, strides=2,
+                                         activation='relu', name='deconv_decoder_1', trainable=True, padding='same')
         if self.use_batch_norm:
             deconv_decoder = BatchNormalization(name='deconv_decoder_batchnorm_1')(deconv_decoder)
-        deconv_decoder = UpSampling1D(size=2, name='deconv_decoder_upsampling_1')(deconv_decoder)
         if isinstance(self.n_filters, tuple):
             layer_counter = 2
             idx = list(range(len(self.n_filters) - 1))
             idx.reverse()
             for n_filters in map(lambda it: self.n_filters[it], idx):
-                deconv_decoder = Conv1DTranspose(deconv_decoder, n_filters, kernel_size=self.kernel_size,
+                deconv_decoder = Conv1DTranspose(deconv_decoder, n_filters, kernel_size=self.kernel_size, strides=2,
                                                  activation='relu', name='deconv_decoder_{0}'.format(layer_counter),
-                                                 trainable=True, padding='valid')
+                                                 trainable=True, padding='same')
                 if self.use_batch_norm:
                     deconv_decoder = BatchNormalization(name='deconv_decoder_batchnorm_{0}'.format(layer_counter))(
                         deconv_decoder)
-                deconv_decoder = UpSampling1D(size=2, name='deconv_decoder_upsampling_{0}'.format(layer_counter))(
-                    deconv_decoder)
                 layer_counter += 1
-        cropping_size = K.int_shape(deconv_decoder)[1] - self.output_text_size_
+        cropping_size = n_times_of_decoder * (2 ** n_deconv_blocks) - self.output_text_size_
         if cropping_size > 0:
             deconv_decoder = Cropping1D(cropping=(0, cropping_size), name='deconv_decoder_cropping')(deconv_decoder)
         deconv_decoder = Conv1D(filters=output_vector_size, kernel_size=self.kernel_size, activation='linear',
@@ -1283,14 +1522,14 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
                                       name='seq2seq_encoder_input')
         if self.use_attention:
             _, seq2seq_encoder_state = GRU(
-                self.n_recurrent_units, return_sequences=False, return_state=True, dropout=0.5, recurrent_dropout=0.3,
+                self.n_recurrent_units, return_sequences=False, return_state=True, dropout=0.5,
                 name='seq2seq_encoder_gru'
             )(Masking(mask_value=0.0, input_shape=(self.output_text_size_, output_vector_size - 1))(
                 attention_for_seq2seq_encoder(seq2seq_encoder_input)
             ))
         else:
             _, seq2seq_encoder_state = GRU(
-                self.n_recurrent_units, return_sequences=False, return_state=True, dropout=0.5, recurrent_dropout=0.3,
+                self.n_recurrent_units, return_sequences=False, return_state=True, dropout=0.5,
                 name='seq2seq_encoder_gru'
             )(Masking(mask_value=0.0, input_shape=(self.output_text_size_, output_vector_size - 1))(
                 seq2seq_encoder_input
@@ -1298,7 +1537,7 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
         seq2seq_decoder_input = Input(shape=(None, len(self.target_char_index_)),
                                       name='seq2seq_decoder_input')
         seq2seq_decoder_gru = GRU(self.n_recurrent_units, return_sequences=True, return_state=True, dropout=0.5,
-                                  recurrent_dropout=0.3, name='seq2seq_decoder_gru')
+                                  name='seq2seq_decoder_gru')
         seq2seq_decoder = Masking(
             mask_value=0.0, input_shape=(self.output_text_size_in_characters_, len(self.target_char_index_))
         )(seq2seq_decoder_input)
@@ -1314,8 +1553,10 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
             initial_state=seq2seq_state_input
         )
         seq2seq_decoder_output = seq2seq_decoder_dense(seq2seq_decoder_output)
+        indices_of_best_tokens = Lambda(lambda t: K.argmax(t[:, -1, :], axis=-1),
+                                        name='seq2seq_decoder_argmax')(seq2seq_decoder_output)
         generator_decoder_model = Model([seq2seq_decoder_input, seq2seq_state_input],
-                                        [seq2seq_decoder_output, seq2seq_decoder_state], name='DecoderForGenerator')
+                                        [indices_of_best_tokens, seq2seq_decoder_state], name='DecoderForGenerator')
         tau = 0.1
         vae_model_for_training = Model(encoder_input, deconv_decoder_model(z), name='FullVAE')
         if output_vectors is None:
@@ -1323,12 +1564,12 @@ class Conv1dTextVAE(BaseEstimator, TransformerMixin, ClassifierMixin):
             seq2seq_model_for_training = None
             weights_of_layer_for_reconstruction = None
         else:
-            weights_of_layer_for_reconstruction = K.constant(output_vectors.transpose(), dtype='float32')
+            weights_of_layer_for_reconstruction = K.transpose(K.constant(output_vectors, dtype='float32'))
             seq2seq_model_for_training = Model([seq2seq_encoder_input, seq2seq_decoder_input], seq2seq_decoder,
                                                name='seq2seq_for_training')
             vae_model_for_training.compile(optimizer=Nadam(clipnorm=10.0), loss=vae_loss)
             seq2seq_model_for_training.compile(optimizer=RMSprop(lr=self.lr, clipnorm=10.0),
-                                               loss='categorical_crossentropy')
+                                               loss='sparse_categorical_crossentropy')
             if self.verbose:
                 print('')
                 print('ENCODER:')
@@ -1359,6 +1600,22 @@ class SequenceForVAE(Sequence):
         self.output_vocabulary = output_vocabulary
         self.input_word_vectors = input_word_vectors
         self.output_word_vectors = output_word_vectors
+        self.input_token_ids, self.input_token_masks = self.calculate_token_ids(
+            input_texts, input_vocabulary, input_text_size)
+        self.target_token_ids, self.target_token_masks = self.calculate_token_ids(
+            target_texts, output_vocabulary, output_text_size)
+
+    @staticmethod
+    def calculate_token_ids(texts: tuple, vocabulary: dict, text_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        token_ids = np.full((len(texts), text_size), vocabulary[''], dtype=np.int32)
+        token_masks = np.zeros((len(texts), text_size), dtype=np.float32)
+        for text_idx in range(len(texts)):
+            cur_text = texts[text_idx]
+            n_tokens = min(len(cur_text), text_size)
+            for time_idx in range(n_tokens):
+                token_ids[text_idx, time_idx] = vocabulary[cur_text[time_idx]]
+            token_masks[text_idx, 0:min(n_tokens + 1, text_size)] = 1.0
+        return token_ids, token_masks
 
     def __len__(self):
         return self.n_batches
@@ -1366,46 +1623,21 @@ class SequenceForVAE(Sequence):
     def __getitem__(self, idx):
         start_pos = idx * self.batch_size
         end_pos = start_pos + self.batch_size
-        input_vector_size = self.input_word_vectors.shape[1]
         output_vocabulary_size = self.output_word_vectors.shape[0]
-        input_data = np.zeros((self.batch_size, self.input_text_size, input_vector_size), dtype=np.float32)
+        indices_of_texts = np.arange(start_pos, end_pos) % self.n_text_pairs
+        input_data = self.input_word_vectors[self.input_token_ids[indices_of_texts]] * \
+                     self.input_token_masks[indices_of_texts][:, :, np.newaxis]
         target_data = np.zeros((self.batch_size, self.output_text_size, output_vocabulary_size), dtype=np.float32)
-        idx_in_batch = 0
-        for src_text_idx in range(start_pos, end_pos):
-            prep_text_idx = src_text_idx
-            while prep_text_idx >= self.n_text_pairs:
-                prep_text_idx = prep_text_idx - self.n_text_pairs
-            input_text = self.input_texts[prep_text_idx]
-            prev_token = None
-            for time_idx in range(self.input_text_size):
-                if time_idx >= len(input_text):
-                    token = ''
-                else:
-                    token = input_text[time_idx]
-                if prev_token is None:
-                    input_data[idx_in_batch, time_idx] = self.input_word_vectors[self.input_vocabulary[token]]
-                else:
-                    if prev_token != '':
-                        input_data[idx_in_batch, time_idx] = self.input_word_vectors[self.input_vocabulary[token]]
-                prev_token = token
-            target_text = self.target_texts[prep_text_idx]
-            prev_token = None
-            for time_idx in range(self.output_text_size):
-                if time_idx >= len(target_text):
-                    token = ''
-                else:
-                    token = target_text[time_idx]
-                if prev_token is None:
-                    target_data[idx_in_batch, time_idx, self.output_vocabulary[token]] = 1.0
-                else:
-                    if prev_token != '':
-                        target_data[idx_in_batch, time_idx, self.output_vocabulary[token]] = 1.0
-                prev_token = token
-            idx_in_batch += 1
-        return input_data, target_data
+        rows_of_batch = np.arange(self.batch_size)[:, np.newaxis]
+        times_of_batch = np.arange(self.output_text_size)[np.newaxis, :]
+        target_data[rows_of_batch, times_of_batch, self.target_token_ids[indices_of_texts]] = \
+            self.target_token_masks[indices_of_texts]
+        return input_data.astype(np.float32, copy=False), target_data
 
 
 class SequenceForSeq2Seq(Sequence):
+    MAX_CACHE_SIZE_IN_BYTES = 256 * (1024 ** 2)
+
     def __init__(self, tokenizer: BaseTokenizer, input_texts: tuple, target_texts: tuple, batch_size: int,
                  input_text_size: int, output_text_size: int, input_vocabulary: dict, input_word_vectors: np.ndarray,
                  output_char_index: dict, vae: Union[Model, object]):
@@ -1421,45 +1653,73 @@ class SequenceForSeq2Seq(Sequence):
         self.input_word_vectors = input_word_vectors
         self.output_char_index = output_char_index
         self.vae = vae
+        self.input_token_ids = SequenceForVAE.calculate_token_ids(input_texts, input_vocabulary,
+                                                                  input_text_size)[0]
+        self.n_output_chars = len(output_char_index)
+        self.input_vector_size = input_word_vectors.shape[1]
+        self.input_data_buffer = np.zeros((batch_size, input_text_size, self.input_vector_size), dtype=np.float32)
+        self.reconstructed_word_vectors = None
+        self.onehot_eye = np.eye(self.n_output_chars, dtype=np.float32)
+        self.begin_char_idx = output_char_index[Conv1dTextVAE.SEQUENCE_BEGIN]
+        self.end_char_idx = output_char_index[Conv1dTextVAE.SEQUENCE_END]
+        self.target_char_ids = [
+            np.array([output_char_index[cur_char] for cur_char in cur_text[0:(output_text_size - 3)]],
+                     dtype=np.int32)
+            for cur_text in target_texts
+        ]
 
     def __len__(self):
         return self.n_batches
 
+    def calculate_reconstructions(self) -> np.ndarray:
+        reconstructed_word_vectors = None
+        for batch_start in range(0, self.n_text_pairs, self.batch_size):
+            batch_indices = np.arange(batch_start, batch_start + self.batch_size)
+            batch_indices[batch_indices >= self.n_text_pairs] = self.n_text_pairs - 1
+            self.input_data_buffer[:] = self.input_word_vectors[self.input_token_ids[batch_indices]]
+            reconstructed_batch = Conv1dTextVAE.postprocess_reconstructed_word_vectors(
+                self.vae.predict_on_batch(self.input_data_buffer)
+            )
+            if reconstructed_word_vectors is None:
+                cache_shape = (self.n_text_pairs, reconstructed_batch.shape[1], reconstructed_batch.shape[2])
+                if (cache_shape[0] * cache_shape[1] * cache_shape[2] * 4) >= self.MAX_CACHE_SIZE_IN_BYTES:
+                    tmp_cache_name = Conv1dTextVAE.get_temp_name()
+                    reconstructed_word_vectors = np.memmap(tmp_cache_name, mode='w+', dtype=np.float32,
+                                                           shape=cache_shape)
+                    try:
+                        os.remove(tmp_cache_name)
+                    except OSError:
+                        pass
+                else:
+                    reconstructed_word_vectors = np.empty(cache_shape, dtype=np.float32)
+            batch_end = min(batch_start + self.batch_size, self.n_text_pairs)
+            reconstructed_word_vectors[batch_start:batch_end] = reconstructed_batch[0:(batch_end - batch_start)]
+        return reconstructed_word_vectors
+
     def __getitem__(self, idx):
         start_pos = idx * self.batch_size
         end_pos = start_pos + self.batch_size
-        input_vector_size = self.input_word_vectors.shape[1]
-        input_data = np.zeros((self.batch_size, self.input_text_size, input_vector_size), dtype=np.float32)
-        generator_input_data = np.zeros((self.batch_size, self.output_text_size, len(self.output_char_index)),
+        if self.reconstructed_word_vectors is None:
+            self.reconstructed_word_vectors = self.calculate_reconstructions()
+        generator_input_data = np.zeros((self.batch_size, self.output_text_size, self.n_output_chars),
                                         dtype=np.float32)
-        generator_target_data = np.zeros((self.batch_size, self.output_text_size, len(self.output_char_index)),
-                                         dtype=np.float32
-                                         )
+        generator_target_data = np.zeros((self.batch_size, self.output_text_size, 1), dtype=np.int32)
         idx_in_batch = 0
         for src_text_idx in range(start_pos, end_pos):
-            prep_text_idx = src_text_idx
-            while prep_text_idx >= self.n_text_pairs:
-                prep_text_idx = prep_text_idx - self.n_text_pairs
-            input_text = self.input_texts[prep_text_idx]
-            for time_idx in range(self.input_text_size):
-                if time_idx >= len(input_text):
-                    token = ''
-                else:
-                    token = input_text[time_idx]
-                input_data[idx_in_batch, time_idx] = self.input_word_vectors[self.input_vocabulary[token]]
-            target_text_in_characters = self.target_texts[prep_text_idx]
-            generator_input_data[idx_in_batch, 0, self.output_char_index[Conv1dTextVAE.SEQUENCE_BEGIN]] = 1.0
-            T = min(len(target_text_in_characters), self.output_text_size - 3)
-            for t in range(T):
-                char = target_text_in_characters[t]
-                generator_input_data[idx_in_batch, t + 1, self.output_char_index[char]] = 1.0
-                generator_target_data[idx_in_batch, t, self.output_char_index[char]] = 1.0
-            t = T
-            generator_input_data[idx_in_batch, t + 1, self.output_char_index[Conv1dTextVAE.SEQUENCE_END]] = 1.0
-            generator_target_data[idx_in_batch, t, self.output_char_index[Conv1dTextVAE.SEQUENCE_END]] = 1.0
-            generator_target_data[idx_in_batch, t + 1, self.output_char_index[Conv1dTextVAE.SEQUENCE_END]] = 1.0
+            prep_text_idx = src_text_idx % self.n_text_pairs
+            char_ids = self.target_char_ids[prep_text_idx]
+            T = char_ids.shape[0]
+            generator_input_data[idx_in_batch, 0, self.begin_char_idx] = 1.0
+            if T > 0:
+                generator_input_data[idx_in_batch, 1:(T + 1)] = self.onehot_eye[char_ids]
+                generator_target_data[idx_in_batch, 0:T, 0] = char_ids
+            generator_input_data[idx_in_batch, T + 1, self.end_char_idx] = 1.0
+            generator_target_data[idx_in_batch, T, 0] = self.end_char_idx
+            generator_target_data[idx_in_batch, T + 1, 0] = self.end_char_idx
             idx_in_batch += 1
-        reconstructed_word_vectors = Conv1dTextVAE.postprocess_reconstructed_word_vectors(
-            self.vae.predict_on_batch(input_data)
-        )
+        reconstructed_word_vectors = self.reconstructed_word_vectors[
+            np.arange(start_pos, end_pos) % self.n_text_pairs]
         return [reconstructed_word_vectors, generator_input_data], generator_target_data
+
+    def on_epoch_end(self):
+        self.reconstructed_word_vectors = None
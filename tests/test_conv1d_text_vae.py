@@ -337,8 +337,10 @@ class TextSequenceForSeq2Seq(unittest.TestCase):
                              generated_data[0][0].shape, msg='batch_idx={0}'.format(batch_idx))
             self.assertEqual((batch_size, generator.output_text_size, len(all_characters)),
                              generated_data[0][1].shape, msg='batch_idx={0}'.format(batch_idx))
-            self.assertEqual((batch_size, generator.output_text_size, len(all_characters)),
+            self.assertEqual((batch_size, generator.output_text_size, 1),
                              generated_data[1].shape, msg='batch_idx={0}'.format(batch_idx))
+            self.assertTrue(np.issubdtype(generated_data[1].dtype, np.integer),
+                            msg='batch_idx={0}'.format(batch_idx))
             for sample_idx in range(batch_size):
                 n_tokens = len(input_texts[text_idx])
                 for token_idx in range(input_text_size):
@@ -353,8 +355,6 @@ class TextSequenceForSeq2Seq(unittest.TestCase):
                     for char_idx in range(len(all_characters)):
                         self.assertTrue((abs(generated_data[0][1][sample_idx][time_idx][char_idx] - 1.0) < EPS) or
                                         (abs(generated_data[0][1][sample_idx][time_idx][char_idx]) < EPS))
-                        self.assertTrue((abs(generated_data[1][sample_idx][time_idx][char_idx] - 1.0) < EPS) or
-                                        (abs(generated_data[1][sample_idx][time_idx][char_idx]) < EPS))
                     vector_norm = np.linalg.norm(generated_data[0][1][sample_idx][time_idx])
                     self.assertTrue((abs(vector_norm) < EPS) or (abs(1.0 - vector_norm) < EPS))
                     if vector_norm < EPS:
@@ -370,20 +370,15 @@ class TextSequenceForSeq2Seq(unittest.TestCase):
                     generated_data[0][1][sample_idx][n_seq][all_characters.index(Conv1dTextVAE.SEQUENCE_END)],
                     1.0
                 )
-                self.assertAlmostEqual(
-                    generated_data[1][sample_idx][n_seq - 1][all_characters.index(Conv1dTextVAE.SEQUENCE_END)],
-                    1.0
-                )
-                self.assertAlmostEqual(
-                    generated_data[1][sample_idx][n_seq][all_characters.index(Conv1dTextVAE.SEQUENCE_END)],
-                    1.0
-                )
+                self.assertEqual(generated_data[1][sample_idx][n_seq - 1][0],
+                                 all_characters.index(Conv1dTextVAE.SEQUENCE_END))
+                self.assertEqual(generated_data[1][sample_idx][n_seq][0],
+                                 all_characters.index(Conv1dTextVAE.SEQUENCE_END))
                 for time_idx in range(0, n_seq - 1):
-                    for char_idx in range(len(all_characters)):
-                        self.assertAlmostEqual(generated_data[0][1][sample_idx][time_idx + 1][char_idx],
-                                               generated_data[1][sample_idx][time_idx][char_idx])
+                    self.assertEqual(generated_data[1][sample_idx][time_idx][0],
+                                     np.argmax(generated_data[0][1][sample_idx][time_idx + 1]))
                 for time_idx in range(n_seq + 1, generator.output_text_size):
-                    self.assertAlmostEqual(np.linalg.norm(generated_data[1][sample_idx][time_idx]), 0.0)
+                    self.assertEqual(generated_data[1][sample_idx][time_idx][0], 0)
                     self.assertAlmostEqual(np.linalg.norm(generated_data[0][1][sample_idx][time_idx]), 0.0)
                 if text_idx < (len(input_texts) - 1):
                     text_idx += 1
@@ -440,8 +435,10 @@ class TextSequenceForSeq2Seq(unittest.TestCase):
                              generated_data[0][0].shape, msg='batch_idx={0}'.format(batch_idx))
             self.assertEqual((batch_size, generator.output_text_size, len(all_characters)),
                              generated_data[0][1].shape, msg='batch_idx={0}'.format(batch_idx))
-            self.assertEqual((batch_size, generator.output_text_size, len(all_characters)),
+            self.assertEqual((batch_size, generator.output_text_size, 1),
                              generated_data[1].shape, msg='batch_idx={0}'.format(batch_idx))
+            self.assertTrue(np.issubdtype(generated_data[1].dtype, np.integer),
+                            msg='batch_idx={0}'.format(batch_idx))
             for sample_idx in range(batch_size):
                 tokens = input_texts[text_idx]
                 n_tokens = len(tokens)
@@ -476,8 +473,6 @@ class TextSequenceForSeq2Seq(unittest.TestCase):
                     for char_idx in range(len(all_characters)):
                         self.assertTrue((abs(generated_data[0][1][sample_idx][time_idx][char_idx] - 1.0) < EPS) or
                                         (abs(generated_data[0][1][sample_idx][time_idx][char_idx]) < EPS))
-                        self.assertTrue((abs(generated_data[1][sample_idx][time_idx][char_idx] - 1.0) < EPS) or
-                                        (abs(generated_data[1][sample_idx][time_idx][char_idx]) < EPS))
                     vector_norm = np.linalg.norm(generated_data[0][1][sample_idx][time_idx])
                     self.assertTrue((abs(vector_norm) < EPS) or (abs(1.0 - vector_norm) < EPS))
                     if vector_norm < EPS:
@@ -493,20 +488,15 @@ class TextSequenceForSeq2Seq(unittest.TestCase):
                     generated_data[0][1][sample_idx][n_seq][all_characters.index(Conv1dTextVAE.SEQUENCE_END)],
                     1.0
                 )
-                self.assertAlmostEqual(
-                    generated_data[1][sample_idx][n_seq - 1][all_characters.index(Conv1dTextVAE.SEQUENCE_END)],
-                    1.0
-                )
-                self.assertAlmostEqual(
-                    generated_data[1][sample_idx][n_seq][all_characters.index(Conv1dTextVAE.SEQUENCE_END)],
-                    1.0
-                )
+                self.assertEqual(generated_data[1][sample_idx][n_seq - 1][0],
+                                 all_characters.index(Conv1dTextVAE.SEQUENCE_END))
+                self.assertEqual(generated_data[1][sample_idx][n_seq][0],
+                                 all_characters.index(Conv1dTextVAE.SEQUENCE_END))
                 for time_idx in range(0, n_seq - 1):
-                    for char_idx in range(len(all_characters)):
-                        self.assertAlmostEqual(generated_data[0][1][sample_idx][time_idx + 1][char_idx],
-                                               generated_data[1][sample_idx][time_idx][char_idx])
+                    self.assertEqual(generated_data[1][sample_idx][time_idx][0],
+                                     np.argmax(generated_data[0][1][sample_idx][time_idx + 1]))
                 for time_idx in range(n_seq + 1, generator.output_text_size):
-                    self.assertAlmostEqual(np.linalg.norm(generated_data[1][sample_idx][time_idx]), 0.0)
+                    self.assertEqual(generated_data[1][sample_idx][time_idx][0], 0)
                     self.assertAlmostEqual(np.linalg.norm(generated_data[0][1][sample_idx][time_idx]), 0.0)
                 if text_idx < (len(input_texts) - 1):
                     text_idx += 1
@@ -1013,9 +1003,10 @@ class TestConv1dTextVAE(unittest.TestCase):
             batch_data = predicted_data[batch_idx]
             self.assertIsInstance(batch_data, np.ndarray, msg='batch_idx={0}'.format(batch_idx))
             self.assertEqual(len(batch_data.shape), 3, msg='batch_idx={0}'.format(batch_idx))
-            self.assertEqual((batch_size, input_text_size, self.ru_fasttext_model.vector_size + 2),
+            true_batch_size = min(batch_size, n_texts - batch_idx * batch_size)
+            self.assertEqual((true_batch_size, input_text_size, self.ru_fasttext_model.vector_size + 2),
                              batch_data.shape, msg='batch_idx={0}'.format(batch_idx))
-            for sample_idx in range(batch_size):
+            for sample_idx in range(true_batch_size):
                 n_tokens = len(Conv1dTextVAE.tokenize(
                     self.input_texts[text_idx], tokenizer.tokenize_into_words(self.input_texts[text_idx])
                 ))
@@ -1039,8 +1030,7 @@ class TestConv1dTextVAE(unittest.TestCase):
                     else:
                         self.assertAlmostEqual(vector_norm, 0.0, delta=1e-4,
                                                msg='batch_idx={0}, sample_idx={1}'.format(batch_idx, sample_idx))
-                if text_idx < (n_texts - 1):
-                    text_idx += 1
+                text_idx += 1
 
     def test_texts_to_data_positive02(self):
         special_symbols = ('\t', '\n')
@@ -1063,9 +1053,10 @@ class TestConv1dTextVAE(unittest.TestCase):
             batch_data = predicted_data[batch_idx]
             self.assertIsInstance(batch_data, np.ndarray, msg='batch_idx={0}'.format(batch_idx))
             self.assertEqual(len(batch_data.shape), 3, msg='batch_idx={0}'.format(batch_idx))
-            self.assertEqual((batch_size, input_text_size, self.ru_fasttext_model.vector_size + 4),
+            true_batch_size = min(batch_size, n_texts - batch_idx * batch_size)
+            self.assertEqual((true_batch_size, input_text_size, self.ru_fasttext_model.vector_size + 4),
                              batch_data.shape, msg='batch_idx={0}'.format(batch_idx))
-            for sample_idx in range(batch_size):
+            for sample_idx in range(true_batch_size):
                 tokens = Conv1dTextVAE.tokenize(
                     input_texts[text_idx], tokenizer.tokenize_into_words(input_texts[text_idx])
                 )
@@ -1108,8 +1099,7 @@ class TestConv1dTextVAE(unittest.TestCase):
                     else:
                         self.assertAlmostEqual(vector_norm, 0.0, delta=1e-4,
                                                msg='batch_idx={0}, sample_idx={1}'.format(batch_idx, sample_idx))
-                if text_idx < (n_texts - 1):
-                    text_idx += 1
+                text_idx += 1
 
     def test_find_best_words_positive01(self):
         word_vector = np.zeros((self.ru_fasttext_model.vector_size + 2,), dtype=np.float32)